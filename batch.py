@@ -0,0 +1,26 @@
+from deep_research.batch import run_batch
+import argparse
+import asyncio
+import json
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate deep research reports for every topic of a JSONL file.")
+    parser.add_argument("input", help="JSONL file with one {\"topic\", \"outline\", \"id\"?, \"config\"?} record per line")
+    parser.add_argument("--output-dir", default="batch_output", help="Directory for the reports, results and summary")
+    parser.add_argument("--max-concurrent-reports", type=int, default=4, help="Number of reports generated at the same time")
+    parser.add_argument("--max-concurrent-llm-calls", type=int, default=8, help="Cap on LLM calls in flight across all reports (0 disables it)")
+    parser.add_argument("--max-concurrent-searches", type=int, default=8, help="Cap on Tavily searches in flight across all reports (0 disables it)")
+    args = parser.parse_args()
+
+    configurable = {
+        "max_concurrent_llm_calls": args.max_concurrent_llm_calls,
+        "max_concurrent_searches": args.max_concurrent_searches
+    }
+
+    summary = asyncio.run(run_batch(args.input, args.output_dir, configurable, args.max_concurrent_reports))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+from deep_research.struct import Sections, Section, Queries, Query, Feedback, SubSectionCoverage, ConclusionAndReferences
+import asyncio
+import hashlib
+import time
+
+
+FILLER = "The benchmark fake model writes this sentence to pad its answer to the configured length. "
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic chat model for benchmarks.
+
+    Every call sleeps for `latency` seconds and answers with `output_tokens` tokens of filler
+    text, streamed word by word, or with a fixed instance of the requested schema for structured
+    output, returned as a tool call like the providers do.
+    """
+
+    latency: float = 0.0
+    output_tokens: int = 200
+    num_sections: int = 3
+    num_queries: int = 3
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _message(self, messages) -> AIMessage:
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        return AIMessage(
+            content=(FILLER * (self.output_tokens * 4 // len(FILLER) + 1))[:self.output_tokens * 4],
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": self.output_tokens, "total_tokens": input_tokens + self.output_tokens}
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    def _chunks(self, messages):
+        message = self._message(messages)
+        words = message.content.split(" ")
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content=word if last else word + " ",
+                usage_metadata=message.usage_metadata if last else None
+            ))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        for chunk in self._chunks(messages):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(messages):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+    def structured_output(self, schema: type[BaseModel]) -> BaseModel:
+        if schema is Sections:
+            return Sections(sections=[
+                Section(section_name=f"Section {i + 1}", sub_sections=[f"Sub-section {i + 1}.{j + 1}" for j in range(3)])
+                for i in range(self.num_sections)
+            ])
+        if schema is Queries:
+            return Queries(queries=[Query(query=f"benchmark query {i + 1}") for i in range(self.num_queries)])
+        if schema is Feedback:
+            # Never covers every sub-section, so each case runs all of its reflection rounds
+            return Feedback(coverage=[
+                SubSectionCoverage(sub_section_index=0, score=1.0),
+                SubSectionCoverage(sub_section_index=1, score=0.5, missing="More detail."),
+            ])
+        if schema is ConclusionAndReferences:
+            return ConclusionAndReferences(conclusion=FILLER * 4, references=[f"Reference {i + 1}" for i in range(5)])
+        raise ValueError(f"The benchmark fake model has no output for {schema.__name__}.")
+
+    def _structured_result(self, schema: type[BaseModel], prompt_value, include_raw: bool):
+        parsed = self.structured_output(schema)
+        if not include_raw:
+            return parsed
+        input_tokens = sum(len(str(message.content)) for message in prompt_value.to_messages()) // 4
+        output_tokens = len(parsed.model_dump_json()) // 4
+        raw = AIMessage(
+            content="",
+            tool_calls=[{"name": schema.__name__, "args": parsed.model_dump(mode="json"), "id": "call_0"}],
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+        )
+        return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+    def with_structured_output(self, schema, include_raw: bool = False, **kwargs):
+        def invoke(prompt_value):
+            time.sleep(self.latency)
+            return self._structured_result(schema, prompt_value, include_raw)
+
+        async def ainvoke(prompt_value):
+            await asyncio.sleep(self.latency)
+            return self._structured_result(schema, prompt_value, include_raw)
+
+        return RunnableLambda(invoke, afunc=ainvoke)
+
+
+class FakeTavilyClient:
+    """
+    Deterministic stand-in for `TavilyClient` and `AsyncTavilyClient`.
+
+    Each search sleeps for `latency` seconds and returns `max_results` results whose raw
+    content is `payload_bytes` long and includes some navigation and cookie-banner lines.
+    """
+
+    latency: float = 0.0
+    payload_bytes: int = 20_000
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def _response(self, query: str, max_results: int) -> dict:
+        query_hash = hashlib.sha256(query.encode("utf-8")).hexdigest()[:8]
+        results = []
+        for i in range(max_results):
+            paragraph = f"Result {i + 1} for {query} explains one finding with some supporting numbers.\n"
+            body = "Home | Blog | About | Contact\nAccept all cookies\n" + paragraph * (self.payload_bytes // len(paragraph) + 1)
+            results.append({
+                "url": f"https://example.com/{query_hash}/{i}",
+                "title": f"Result {i + 1} for {query}",
+                "content": paragraph,
+                "raw_content": body[:self.payload_bytes],
+            })
+        return {"query": query, "results": results}
+
+    def search(self, query: str, max_results: int = 5, **kwargs) -> dict:
+        time.sleep(self.latency)
+        return self._response(query, max_results)
+
+
+class FakeAsyncTavilyClient(FakeTavilyClient):
+
+    async def search(self, query: str, max_results: int = 5, **kwargs) -> dict:
+        await asyncio.sleep(self.latency)
+        return self._response(query, max_results)
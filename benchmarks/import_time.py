@@ -0,0 +1,114 @@
+"""
+Import-time benchmark of the entry points.
+
+Imports each entry point in fresh interpreters, reports the median import time next to the
+stored baseline and checks that no LLM provider package or notebook-only module is loaded
+before it is needed.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --top 15
+    python -m benchmarks.import_time --update-baseline
+"""
+from typing import Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_baseline.json")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = ("deep_research.graph", "main", "batch")
+# Modules that must only be imported on demand: the provider selected by init_llm, and notebook display helpers
+LAZY_MODULES = ("langchain_openai", "langchain_anthropic", "langchain_google_genai", "langchain_ollama", "IPython")
+
+MEASURE_SCRIPT = """
+import json, sys, time
+started_at = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - started_at, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(module: str) -> Dict:
+    """Import `module` in a fresh interpreter and return the time it took and the modules it loaded."""
+    completed = subprocess.run(
+        [sys.executable, "-c", MEASURE_SCRIPT.format(module=module)],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str, top: int) -> List[str]:
+    """Return the `top` slowest imports of `module`, by cumulative time, from `python -X importtime`."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    return [f"{cumulative_us / 1000:>9.1f} ms {name}" for cumulative_us, name in sorted(rows, reverse=True)[:top]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import time of the entry points.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per entry point; the median is reported")
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest imports of each entry point")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative growth reported as a regression")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {}
+    problems = []
+    print(f"{'entry point':<24}{'median s':>10}{'baseline s':>12}{'Δ':>8}")
+    for module in ENTRY_POINTS:
+        measurements = [measure(module) for _ in range(args.runs)]
+        seconds = statistics.median(measurement["seconds"] for measurement in measurements)
+        results[module] = round(seconds, 4)
+
+        baseline_seconds = baseline.get(module)
+        delta = f"{seconds / baseline_seconds - 1:+.0%}" if baseline_seconds else "new"
+        print(f"{module:<24}{seconds:>10.3f}{baseline_seconds or 0:>12.3f}{delta:>8}")
+        if baseline_seconds and seconds > baseline_seconds * (1 + args.tolerance):
+            problems.append(f"{module} imports in {seconds:.3f}s, baseline {baseline_seconds:.3f}s ({delta})")
+
+        eager_modules = [name for name in LAZY_MODULES if name in measurements[0]["modules"]]
+        if eager_modules:
+            problems.append(f"{module} eagerly imports {', '.join(eager_modules)}")
+
+        if args.top:
+            print("\n".join(slowest_imports(module, args.top)) + "\n")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline updated: {args.baseline}")
+
+    if problems:
+        print("\nImport-time problems:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
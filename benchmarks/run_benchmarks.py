@@ -0,0 +1,214 @@
+"""
+Offline end-to-end benchmarks of the research graph.
+
+Runs `agent_graph` against the deterministic fakes in `benchmarks/fakes.py` for every
+combination of the swept parameters, each in its own process so that its peak RSS is its
+own, and compares wall time, peak RSS and checkpoint size with the stored baseline.
+
+Usage:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --sections 2 4 --num-reflections 2 --llm-latency 0.05
+    python -m benchmarks.run_benchmarks --update-baseline
+"""
+from typing import Dict, List
+import argparse
+import itertools
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Metrics compared with the baseline; a case regresses when one grows by more than the tolerance
+COMPARED_METRICS = ("wall_seconds", "peak_rss_mb", "checkpoint_bytes")
+
+
+def case_key(case: Dict) -> str:
+    return ",".join(f"{name}={case[name]}" for name in ("sections", "max_queries", "search_depth", "num_reflections"))
+
+
+def _checkpoint_bytes(saver, thread_id: str) -> int:
+    """Return the serialized size of every checkpoint, channel value and pending write of a thread in a MemorySaver."""
+    size = 0
+    for checkpoints in saver.storage.get(thread_id, {}).values():
+        for checkpoint, metadata, _ in checkpoints.values():
+            size += len(checkpoint[1]) + len(metadata[1])
+    for (blob_thread_id, *_), (_, value) in saver.blobs.items():
+        if blob_thread_id == thread_id:
+            size += len(value)
+    for (write_thread_id, *_), writes in saver.writes.items():
+        if write_thread_id == thread_id:
+            size += sum(len(write[2][1]) for write in writes.values())
+    return size
+
+
+def run_case(case: Dict, settings: Dict) -> Dict:
+    """Run one configuration of the graph against the fakes and return its measurements."""
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+    os.chdir(tempfile.mkdtemp(prefix="deep-research-benchmark-"))
+    os.makedirs("logs", exist_ok=True)
+    os.makedirs("reports", exist_ok=True)
+
+    from benchmarks.fakes import FakeChatModel, FakeTavilyClient, FakeAsyncTavilyClient
+    import deep_research.search as search
+    import deep_research.utils as utils
+
+    FakeTavilyClient.latency = settings["search_latency"]
+    FakeTavilyClient.payload_bytes = settings["payload_bytes"]
+    fake_model = FakeChatModel(
+        latency=settings["llm_latency"],
+        output_tokens=settings["output_tokens"],
+        num_sections=case["sections"],
+        num_queries=case["max_queries"]
+    )
+    utils.init_llm = lambda **kwargs: fake_model
+    search.TavilyClient = FakeTavilyClient
+    search.AsyncTavilyClient = FakeAsyncTavilyClient
+
+    from deep_research.checkpoint import memory_saver
+    from deep_research.graph import agent_graph
+    from deep_research.metrics import metrics
+
+    thread_id = str(uuid.uuid4())
+    config = {
+        "configurable": {
+            "thread_id": thread_id,
+            "auto_approve": True,
+            "max_queries": case["max_queries"],
+            "search_depth": case["search_depth"],
+            "num_reflections": case["num_reflections"],
+            "max_parallel_sections": settings["max_parallel_sections"],
+            "blob_store_path": "blobs",
+            "log_path": "logs/agent_logs.jsonl"
+        },
+        "recursion_limit": 1000
+    }
+
+    started_at = time.perf_counter()
+    agent_graph.invoke({"topic": "Benchmark", "outline": "A deterministic benchmark report."}, config=config)
+    wall_seconds = time.perf_counter() - started_at
+
+    summary = metrics.summary(thread_id)
+    return {
+        "wall_seconds": round(wall_seconds, 4),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "checkpoint_bytes": _checkpoint_bytes(memory_saver, thread_id),
+        "llm_calls": summary["total"]["llm_calls"],
+        "tavily_calls": summary["total"]["tavily_calls"],
+        "node_seconds": {node: round(row["wall_seconds"], 4) for node, row in summary.items() if node != "total"},
+    }
+
+
+def _run_case_in_subprocess(case: Dict, settings: Dict) -> Dict:
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run_benchmarks", "--case", json.dumps({"case": case, "settings": settings})],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark case {case_key(case)} failed:\n{completed.stderr[-4000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _compare(results: Dict[str, Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """Print the results next to the baseline and return the regressed metrics."""
+    regressions = []
+    print(f"{'case':<58}{'wall s':>10}{'Δ':>8}{'rss MB':>9}{'Δ':>8}{'ckpt KB':>10}{'Δ':>8}")
+    for key, result in results.items():
+        baseline_result = baseline.get("results", {}).get(key)
+        columns = []
+        for metric in COMPARED_METRICS:
+            value = result[metric]
+            scaled = value / 1024 if metric == "checkpoint_bytes" else value
+            if baseline_result is None or not baseline_result.get(metric):
+                delta = "new"
+            else:
+                change = value / baseline_result[metric] - 1
+                delta = f"{change:+.0%}"
+                if change > tolerance:
+                    regressions.append(f"{key}: {metric} {baseline_result[metric]} -> {value} ({delta})")
+            columns.append(f"{scaled:>{10 if metric != 'peak_rss_mb' else 9}.{2 if metric == 'wall_seconds' else 1}f}{delta:>8}")
+        print(f"{key:<58}{''.join(columns)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline end-to-end benchmarks of the research graph.")
+    parser.add_argument("--sections", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--max-queries", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--search-depth", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--num-reflections", type=int, nargs="+", default=[2, 3])
+    parser.add_argument("--llm-latency", type=float, default=0.01, help="Seconds each fake LLM call takes")
+    parser.add_argument("--search-latency", type=float, default=0.01, help="Seconds each fake Tavily search takes")
+    parser.add_argument("--payload-bytes", type=int, default=20_000, help="Size of the raw content of each fake search result")
+    parser.add_argument("--output-tokens", type=int, default=200, help="Length of each fake LLM answer")
+    parser.add_argument("--max-parallel-sections", type=int, default=1)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative growth of a metric reported as a regression")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        payload = json.loads(args.case)
+        print(json.dumps(run_case(payload["case"], payload["settings"])))
+        return
+
+    settings = {
+        "llm_latency": args.llm_latency,
+        "search_latency": args.search_latency,
+        "payload_bytes": args.payload_bytes,
+        "output_tokens": args.output_tokens,
+        "max_parallel_sections": args.max_parallel_sections,
+    }
+    cases = [
+        {"sections": sections, "max_queries": max_queries, "search_depth": search_depth, "num_reflections": num_reflections}
+        for sections, max_queries, search_depth, num_reflections
+        in itertools.product(args.sections, args.max_queries, args.search_depth, args.num_reflections)
+    ]
+
+    results = {}
+    for case in cases:
+        results[case_key(case)] = _run_case_in_subprocess(case, settings)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != settings:
+            print(f"Warning: the baseline was recorded with different settings: {baseline.get('settings')}")
+
+    regressions = _compare(results, baseline, args.tolerance)
+
+    slowest_case = max(results, key=lambda key: results[key]["wall_seconds"])
+    print(f"\nPer-node seconds of the slowest case ({slowest_case}):")
+    for node, seconds in sorted(results[slowest_case]["node_seconds"].items(), key=lambda item: -item[1]):
+        print(f"  {node:<26}{seconds:>8.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "results": results}, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "results": results}, f, indent=2)
+        print(f"\nBaseline updated: {args.baseline}")
+    elif regressions:
+        print("\nRegressions beyond the tolerance:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
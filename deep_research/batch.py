@@ -0,0 +1,215 @@
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph.state import CompiledStateGraph
+from typing import Dict, List, Set
+from .blobs import get_blob_store
+from .checkpoint import compact_checkpoints, get_sqlite_saver, prune_blobs
+from .configuration import Configuration
+from .documents import clear_document_store
+from .event_log import get_event_logger
+from .graph import aget_agent_graph
+from .metrics import metrics
+from .resilience import resilience
+from .search import search_cache_stats
+import asyncio
+import hashlib
+import json
+import os
+import time
+import traceback
+
+
+def load_batch(path: str) -> List[Dict]:
+    """
+    Read the items of a batch from a JSONL file.
+
+    Each line holds a `topic`, an `outline` and optionally an `id` and a `config` dict of
+    Configuration overrides for that report. Items without an id are identified by a hash
+    of their topic and outline, so the same file maps to the same ids across runs.
+
+    Args:
+        path: The path of the JSONL file.
+
+    Returns:
+        The items, each with its `id` set.
+
+    Raises:
+        ValueError: If a line is missing its topic or outline, or two items share an id.
+    """
+    items = []
+    seen_ids = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if not item.get("topic") or not item.get("outline"):
+                raise ValueError(f"Line {line_number} of {path} needs both a 'topic' and an 'outline'.")
+            item_id = str(item.get("id") or hashlib.sha256(f"{item['topic']}\n{item['outline']}".encode("utf-8")).hexdigest()[:16])
+            if item_id in seen_ids:
+                raise ValueError(f"Line {line_number} of {path} repeats the item id '{item_id}'.")
+            seen_ids.add(item_id)
+            items.append({**item, "id": item_id})
+    return items
+
+
+def _completed_item_ids(results_path: str, reports_dir: str) -> Set[str]:
+    """Return the ids of the items a previous run of the batch finished, whose report is still on disk."""
+    if not os.path.exists(results_path):
+        return set()
+    completed_ids = set()
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            if result["status"] == "succeeded" and os.path.exists(os.path.join(reports_dir, f"{result['id']}.md")):
+                completed_ids.add(result["id"])
+    return completed_ids
+
+
+def _item_thread_id(item: Dict, output_dir: str) -> str:
+    """
+    Return the checkpoint thread id of a batch item.
+
+    The id only depends on the item and the output directory of the batch, so rerunning the
+    batch picks up the threads of its unfinished items, while batches that reuse an item id for
+    another topic, or write elsewhere, do not share threads.
+    """
+    key = json.dumps([os.path.abspath(output_dir), item["topic"], item["outline"]])
+    return f"batch-{item['id']}-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:12]}"
+
+
+async def _run_item(agent_graph: CompiledStateGraph, item: Dict, base_configurable: Dict, thread_id: str) -> str:
+    """Generate the report of one batch item, resuming its thread if a previous run left it unfinished, and return its content."""
+    config: RunnableConfig = {
+        "configurable": {
+            **item.get("config", {}),
+            **base_configurable,
+            # There is nobody to review the report structure in a batch
+            "auto_approve": True,
+            "thread_id": thread_id
+        }
+    }
+    snapshot = await agent_graph.aget_state(config)
+    if snapshot.next:
+        print(f"Resuming item {item['id']} from its last checkpoint.")
+        result = await agent_graph.ainvoke(None, config=config)
+    elif snapshot.values.get("final_report_content"):
+        # The run finished, but the batch stopped before the report was written out
+        return snapshot.values["final_report_content"]
+    else:
+        result = await agent_graph.ainvoke({"topic": item["topic"], "outline": item["outline"]}, config=config)
+    return result["final_report_content"]
+
+
+async def run_batch(
+        input_path: str,
+        output_dir: str,
+        configurable: Dict,
+        max_concurrent_reports: int = 4
+) -> Dict:
+    """
+    Generate the reports of a batch concurrently on a single event loop.
+
+    At most `max_concurrent_reports` reports are in progress at once, while the
+    `max_concurrent_llm_calls` and `max_concurrent_searches` settings cap the calls of all of
+    them together. The reports share the process-wide LLM and search clients, rate limiter,
+    caches and blob store.
+
+    Every finished item is appended to `results.jsonl` in the output directory and its report
+    is written to `reports/<id>.md`. Items that a previous run completed are skipped, so an
+    interrupted batch can be restarted with the same arguments. The thread id of each item is
+    derived from the item, so with the SQLite checkpointer an item that was interrupted or
+    failed mid-run resumes from its last checkpoint. The node spans of each item
+    are exported to `spans/<id>.jsonl` and its token and cost totals are added to its result.
+    With the SQLite checkpointer, superseded checkpoints are compacted once the batch is over.
+    A summary of throughput, cost, failures, retry counters and search cache counters is written to `summary.json`.
+
+    Args:
+        input_path: The JSONL file listing the items of the batch.
+        output_dir: The directory the reports, results and summary are written to.
+        configurable: Configuration values applied to every item, taking precedence over the
+            item's own `config`. The checkpointer is chosen once for the whole batch.
+        max_concurrent_reports: The number of reports generated at the same time.
+
+    Returns:
+        The summary of the batch.
+    """
+    items = load_batch(input_path)
+    reports_dir = os.path.join(output_dir, "reports")
+    results_path = os.path.join(output_dir, "results.jsonl")
+    os.makedirs(reports_dir, exist_ok=True)
+    # The nodes write their logs and a copy of each report relative to the working directory
+    os.makedirs("logs", exist_ok=True)
+    os.makedirs("reports", exist_ok=True)
+
+    completed_ids = _completed_item_ids(results_path, reports_dir)
+    pending_items = [item for item in items if item["id"] not in completed_ids]
+    print(f"{len(items)} items in the batch, {len(completed_ids & {item['id'] for item in items})} already done, {len(pending_items)} to run.")
+
+    event_logger = get_event_logger(Configuration.from_runnable_config({"configurable": configurable}))
+    semaphore = asyncio.Semaphore(max(1, max_concurrent_reports))
+    results_lock = asyncio.Lock()
+    results = []
+
+    async def run(agent_graph: CompiledStateGraph, item: Dict):
+        async with semaphore:
+            started_at = time.monotonic()
+            thread_id = _item_thread_id(item, output_dir)
+            try:
+                report = await _run_item(agent_graph, item, configurable, thread_id)
+                with open(os.path.join(reports_dir, f"{item['id']}.md"), "w", encoding="utf-8") as f:
+                    f.write(report)
+                result = {"id": item["id"], "topic": item["topic"], "status": "succeeded"}
+            except Exception as e:
+                traceback.print_exc()
+                event_logger.error("batch_item_failed", id=item["id"], thread_id=thread_id, traceback=traceback.format_exc())
+                result = {"id": item["id"], "topic": item["topic"], "status": "failed", "error": f"{type(e).__name__}: {e}"}
+            result["wall_seconds"] = round(time.monotonic() - started_at, 3)
+            totals = metrics.summary(thread_id).get("total", {})
+            result["input_tokens"] = totals.get("input_tokens", 0)
+            result["output_tokens"] = totals.get("output_tokens", 0)
+            result["cost_usd"] = round(totals.get("cost_usd", 0.0), 6)
+            metrics.export_jsonl(os.path.join(output_dir, "spans", f"{item['id']}.jsonl"), thread_id)
+            metrics.clear(thread_id)
+            clear_document_store(thread_id)
+            event_logger.info("batch_item_finished", thread_id=thread_id, **result)
+            print(f"Item {item['id']} ({item['topic']}) {result['status']} in {result['wall_seconds']} seconds.")
+
+            async with results_lock:
+                results.append(result)
+                with open(results_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(result) + "\n")
+
+    started_at = time.monotonic()
+    base_configurable = Configuration.from_runnable_config({"configurable": configurable})
+    async with aget_agent_graph(base_configurable) as agent_graph:
+        await asyncio.gather(*(run(agent_graph, item) for item in pending_items))
+    wall_seconds = time.monotonic() - started_at
+
+    if base_configurable.checkpointer == "sqlite":
+        # Once the batch is over, only the latest checkpoint of each thread is worth keeping
+        saver = get_sqlite_saver(base_configurable.checkpoint_path)
+        deleted = await asyncio.to_thread(compact_checkpoints, saver)
+        pruned = await asyncio.to_thread(prune_blobs, saver, get_blob_store(base_configurable.blob_store_path))
+        print(f"Compacted {deleted} superseded checkpoints and deleted {pruned} unreferenced blobs.")
+
+    succeeded = [result for result in results if result["status"] == "succeeded"]
+    failed = [result for result in results if result["status"] == "failed"]
+    summary = {
+        "items": len(items),
+        "skipped": len(items) - len(pending_items),
+        "succeeded": len(succeeded),
+        "failed": len(failed),
+        "wall_seconds": round(wall_seconds, 3),
+        "reports_per_hour": round(len(succeeded) * 3600 / wall_seconds, 2) if wall_seconds > 0 else 0,
+        "cost_usd": round(sum(result["cost_usd"] for result in results), 6),
+        "mean_report_seconds": round(sum(result["wall_seconds"] for result in succeeded) / len(succeeded), 3) if succeeded else 0,
+        "failures": [{"id": result["id"], "topic": result["topic"], "error": result["error"]} for result in failed],
+        "resilience": resilience.counters(),
+        "search_cache": search_cache_stats(base_configurable)
+    }
+    event_logger.info("batch_finished", **summary)
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
@@ -0,0 +1,96 @@
+from functools import lru_cache
+from typing import Set
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+
+BLOB_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """
+    File-backed, content-addressed store for large text payloads.
+
+    Each blob is written once to `<path>/<id[:2]>/<id>`, where the id is the SHA-256 hash of
+    its content, so graph state and checkpoints only need to hold the short id. Blobs are
+    immutable and written atomically, which makes the store safe to share between threads,
+    processes and resumed runs. The async methods do the file I/O on a worker thread, so
+    they do not block the event loop.
+
+    Blobs are not deleted by the runs that write them; `prune` removes the ones no
+    checkpoint refers to any more (see `checkpoint.prune_blobs`). Storing content that is
+    already present refreshes the modification time of its blob, which is what `prune`
+    uses to spare blobs that a run in progress may still need.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _blob_path(self, blob_id: str) -> str:
+        return os.path.join(self.path, blob_id[:2], blob_id)
+
+    def put(self, content: str) -> str:
+        """Store `content` and return its blob id."""
+        data = content.encode("utf-8")
+        blob_id = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(blob_id)
+        try:
+            os.utime(blob_path)
+            return blob_id
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, blob_path)
+        return blob_id
+
+    def get(self, blob_id: str) -> str:
+        """Return the content of a blob."""
+        with open(self._blob_path(blob_id), "rb") as f:
+            return f.read().decode("utf-8")
+
+    async def aput(self, content: str) -> str:
+        """Async version of `put`."""
+        return await asyncio.to_thread(self.put, content)
+
+    async def aget(self, blob_id: str) -> str:
+        """Async version of `get`."""
+        return await asyncio.to_thread(self.get, blob_id)
+
+    def prune(self, keep_ids: Set[str], min_age_seconds: float) -> int:
+        """
+        Delete the blobs missing from `keep_ids` that were not stored in the last `min_age_seconds`.
+
+        Args:
+            keep_ids: The ids of the blobs that are still referenced.
+            min_age_seconds: Blobs stored (or stored again) more recently than this are kept.
+
+        Returns:
+            The number of blobs that were deleted.
+        """
+        deleted = 0
+        cutoff = time.time() - min_age_seconds
+        for prefix in os.scandir(self.path):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if BLOB_ID_PATTERN.match(entry.name) and entry.name not in keep_ids and entry.stat().st_mtime < cutoff:
+                    try:
+                        os.remove(entry.path)
+                        deleted += 1
+                    except FileNotFoundError:
+                        pass
+        return deleted
+
+
+@lru_cache(maxsize=None)
+def get_blob_store(path: str) -> BlobStore:
+    """Return the process-wide blob store rooted at `path`."""
+    return BlobStore(path)
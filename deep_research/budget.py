@@ -0,0 +1,151 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from langchain_core.prompts import ChatPromptTemplate
+from typing import Any, Dict, List, Literal, Optional
+from .configuration import Configuration
+from .metrics import record_prompt_trim
+from .preprocess import truncate_to_tokens
+from .utils import count_tokens, estimate_tokens
+
+
+# Context window sizes in tokens, matched by the longest model name prefix
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-5": 400_000,
+    "gpt-4o": 128_000,
+    "chatgpt-4o": 128_000,
+    "gpt-4.1": 1_047_576,
+    "gpt-4-turbo": 128_000,
+    "gpt-3.5-turbo": 16_385,
+    "o1": 200_000,
+    "o3": 200_000,
+    "o4-mini": 200_000,
+    "claude": 200_000,
+    "gemini-1.5-pro": 2_097_152,
+    "gemini-1.5-flash": 1_048_576,
+    "gemini-2": 1_048_576,
+    "llama-3.1": 128_000,
+    "llama-3.3": 128_000,
+    "llama3": 8_192,
+    "mistral": 32_768,
+    "qwen2.5": 32_768,
+}
+# Share of the context window used, to absorb the error of the approximate token count
+CONTEXT_WINDOW_SAFETY_MARGIN = 0.9
+
+
+def context_window(model: str) -> Optional[int]:
+    """Return the context window of a model, in tokens, or None if the model is not in the table."""
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if model.startswith(prefix)]
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)] if matches else None
+
+
+@lru_cache(maxsize=None)
+def _warn_unknown_context_window(model: str):
+    print(
+        f"The context window of {model} is unknown, so prompts are not trimmed to fit it. "
+        "Set CONTEXT_WINDOW_TOKENS or PROMPT_TOKEN_BUDGET to enable trimming."
+    )
+
+
+def prompt_token_budget(configurable: Configuration) -> Optional[int]:
+    """
+    Return the number of prompt tokens available to a call with the configured model.
+
+    This is the model's context window, less a safety margin and the tokens reserved for the
+    answer, further capped by `prompt_token_budget` when it is set. The context window is
+    `context_window_tokens` when set, or looked up in `MODEL_CONTEXT_WINDOWS`. For a model
+    missing from the table, only `prompt_token_budget` applies, and None (no budget) is
+    returned when it is not set either.
+    """
+    window = configurable.context_window_tokens or context_window(configurable.model)
+    if window is None:
+        _warn_unknown_context_window(configurable.model)
+        return configurable.prompt_token_budget if configurable.prompt_token_budget > 0 else None
+
+    budget = int(window * CONTEXT_WINDOW_SAFETY_MARGIN) - configurable.reserved_output_tokens
+    if configurable.prompt_token_budget > 0:
+        budget = min(budget, configurable.prompt_token_budget)
+    return max(budget, 0)
+
+
+@dataclass
+class PromptInput:
+    """
+    A prompt variable whose content may be cut to fit the token budget.
+
+    The content is a list of pieces (documents, sections, references...) joined by
+    `separator`. Inputs with the lowest `priority` are trimmed first, either by dropping
+    pieces from the end of the list ("drop", for ranked pieces) or by shortening every
+    piece in proportion to its length ("truncate", for pieces that are all needed).
+    """
+    name: str
+    pieces: List[str]
+    priority: int
+    strategy: Literal["drop", "truncate"] = "truncate"
+    separator: str = "\n\n"
+    dropped_pieces: int = field(default=0, init=False)
+
+    def render(self) -> str:
+        return self.separator.join(self.pieces)
+
+    def tokens(self) -> int:
+        return count_tokens(self.render())
+
+    def trim(self, tokens: int) -> int:
+        """Remove about `tokens` tokens from the content and return the number actually removed."""
+        tokens_before = self.tokens()
+        if self.strategy == "drop":
+            while len(self.pieces) > 1 and tokens_before - self.tokens() < tokens:
+                self.pieces.pop()
+                self.dropped_pieces += 1
+            tokens = tokens - (tokens_before - self.tokens())
+        if tokens > 0:
+            # Shorten the remaining pieces in proportion to their length
+            keep_ratio = max(self.tokens() - tokens, 0) / max(self.tokens(), 1)
+            self.pieces = [
+                truncate_to_tokens(piece, int(count_tokens(piece) * keep_ratio)) if int(count_tokens(piece) * keep_ratio) > 0 else ""
+                for piece in self.pieces
+            ]
+        return tokens_before - self.tokens()
+
+
+def fit_prompt_inputs(
+        prompt: ChatPromptTemplate,
+        inputs: Dict[str, Any],
+        configurable: Configuration,
+        budgeted_inputs: List[PromptInput]
+) -> Dict[str, Any]:
+    """
+    Fit the inputs of a prompt to the prompt token budget of the configured model.
+
+    The parts of the prompt outside of `budgeted_inputs` are always kept. When the rendered
+    prompt would exceed the budget, the budgeted inputs are trimmed in order of increasing
+    priority until it fits. Every trim is recorded in the metrics of the current node.
+
+    Args:
+        prompt: The chat prompt template the inputs are rendered with.
+        inputs: The variables of the prompt.
+        configurable: The configuration holding the model and the budget settings.
+        budgeted_inputs: The variables that may be trimmed, given as lists of pieces.
+
+    Returns:
+        The variables of the prompt, with the budgeted ones rendered to strings that fit.
+    """
+    budget = prompt_token_budget(configurable)
+    if budget is None:
+        return {**inputs, **{item.name: item.render() for item in budgeted_inputs}}
+    fixed_tokens = estimate_tokens(prompt.format_messages(**{**inputs, **{item.name: "" for item in budgeted_inputs}}))
+    overflow = fixed_tokens + sum(item.tokens() for item in budgeted_inputs) - budget
+
+    for item in sorted(budgeted_inputs, key=lambda item: item.priority):
+        if overflow <= 0:
+            break
+        removed_tokens = item.trim(overflow)
+        overflow -= removed_tokens
+        description = f"{item.name}: removed ~{removed_tokens} tokens"
+        if item.dropped_pieces:
+            description += f", dropped {item.dropped_pieces} of {item.dropped_pieces + len(item.pieces)} pieces"
+        record_prompt_trim(description, removed_tokens)
+        print(f"Prompt over the {budget} token budget of {configurable.model}, {description}.")
+
+    return {**inputs, **{item.name: item.render() for item in budgeted_inputs}}
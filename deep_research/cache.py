@@ -0,0 +1,103 @@
+from functools import lru_cache
+from typing import Any, Dict, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+# Hits only refresh the access time of an entry once it is this old, so most hits are read-only
+ACCESS_TIME_RESOLUTION_SECONDS = 60
+
+
+class SQLiteCache:
+    """
+    A persistent key-value cache backed by a SQLite file.
+
+    Values are stored as JSON. Every entry expires `ttl_seconds` after it was written (0 keeps
+    entries forever), and once the cache holds more than `max_entries` entries the least
+    recently used ones are evicted. The access time used for eviction is refreshed lazily, at
+    most once per `ACCESS_TIME_RESOLUTION_SECONDS`, so a hit does not commit a write. The cache
+    keeps hit, miss and eviction counters for the lifetime of the process and can be shared
+    between threads.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: int = 0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+        self._connection.commit()
+
+    def get(self, key: str, ignore_ttl: bool = False) -> Optional[Any]:
+        """
+        Return the cached value for `key`, or None if it is missing or expired.
+
+        With `ignore_ttl`, expired entries are returned and kept, e.g. to replay a run offline
+        from a cache that has aged past its TTL.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute("SELECT value, created_at, accessed_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl_seconds and not ignore_ttl and now - row[1] > self.ttl_seconds:
+                self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._connection.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            if now - row[2] > ACCESS_TIME_RESOLUTION_SECONDS:
+                self._connection.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self._connection.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        """Store `value` under `key`, evicting the least recently used entries beyond `max_entries`."""
+        now = time.time()
+        serialized = json.dumps(value)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, serialized, now, now)
+            )
+            if self.max_entries > 0:
+                evicted = self._connection.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                ).rowcount
+                self.evictions += max(evicted, 0)
+            self._connection.commit()
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._connection.execute("DELETE FROM cache")
+            self._connection.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit, miss and eviction counters along with the current number of entries."""
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "entries": entries}
+
+
+@lru_cache(maxsize=None)
+def get_cache(path: str, max_entries: int, ttl_seconds: int) -> SQLiteCache:
+    """Return the process-wide cache stored at `path`, opened on first use."""
+    return SQLiteCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
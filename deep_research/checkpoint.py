@@ -0,0 +1,157 @@
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Optional
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from .blobs import BlobStore
+from .configuration import Configuration
+import os
+import re
+import sqlite3
+
+
+memory_saver = MemorySaver()
+
+# Blobs written this recently are never pruned, as a run in progress may not have checkpointed them yet
+BLOB_PRUNE_MIN_AGE_SECONDS = 24 * 60 * 60
+_BLOB_ID_BYTES_PATTERN = re.compile(rb"[0-9a-f]{64}")
+
+
+@lru_cache(maxsize=None)
+def get_sqlite_saver(path: str) -> SqliteSaver:
+    """
+    Return the process-wide SQLite checkpointer stored at `path`.
+
+    The database runs in WAL mode, so checkpoints written by parallel sections do not block
+    readers, and a crashed or killed run keeps every checkpoint it committed.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return SqliteSaver(connection)
+
+
+def get_checkpointer(configurable: Configuration) -> BaseCheckpointSaver:
+    """
+    Return the checkpointer selected by `configurable.checkpointer`.
+
+    Args:
+        configurable: The configuration holding the checkpointer type and the SQLite path.
+
+    Returns:
+        The in-process MemorySaver for "memory", or the durable SqliteSaver for "sqlite".
+
+    Raises:
+        ValueError: If the checkpointer type is unknown.
+    """
+    if configurable.checkpointer == "memory":
+        return memory_saver
+    elif configurable.checkpointer == "sqlite":
+        return get_sqlite_saver(configurable.checkpoint_path)
+    raise ValueError(f"Unknown checkpointer '{configurable.checkpointer}'. Use 'memory' or 'sqlite'.")
+
+
+@asynccontextmanager
+async def aget_checkpointer(configurable: Configuration) -> AsyncIterator[BaseCheckpointSaver]:
+    """
+    Async version of `get_checkpointer`.
+
+    The async SQLite checkpointer holds a connection bound to the running event loop, so it
+    is opened for the duration of the context rather than shared process-wide.
+
+    Raises:
+        ValueError: If the checkpointer type is unknown.
+    """
+    if configurable.checkpointer == "memory":
+        yield memory_saver
+    elif configurable.checkpointer == "sqlite":
+        if os.path.dirname(configurable.checkpoint_path):
+            os.makedirs(os.path.dirname(configurable.checkpoint_path), exist_ok=True)
+        async with AsyncSqliteSaver.from_conn_string(configurable.checkpoint_path) as saver:
+            await saver.conn.execute("PRAGMA journal_mode=WAL")
+            await saver.conn.execute("PRAGMA synchronous=NORMAL")
+            yield saver
+    else:
+        raise ValueError(f"Unknown checkpointer '{configurable.checkpointer}'. Use 'memory' or 'sqlite'.")
+
+
+def compact_checkpoints(saver: SqliteSaver, thread_id: Optional[str] = None) -> int:
+    """
+    Drop superseded checkpoints from a SQLite checkpointer.
+
+    Only the latest checkpoint of each thread and namespace, which is all a resumed run
+    needs, is kept along with its pending writes. The database file is vacuumed afterwards
+    so it does not grow without bound across runs.
+
+    Args:
+        saver: The SQLite checkpointer to compact.
+        thread_id: Only compact this thread, or every thread if None.
+
+    Returns:
+        The number of checkpoints that were deleted.
+    """
+    saver.setup()
+    thread_filter = "" if thread_id is None else "AND thread_id = ?"
+    params = () if thread_id is None else (thread_id,)
+
+    with saver.lock:
+        deleted = saver.conn.execute(
+            f"""
+            DELETE FROM checkpoints
+            WHERE checkpoint_id != (
+                SELECT MAX(latest.checkpoint_id) FROM checkpoints AS latest
+                WHERE latest.thread_id = checkpoints.thread_id AND latest.checkpoint_ns = checkpoints.checkpoint_ns
+            ) {thread_filter}
+            """,
+            params
+        ).rowcount
+        saver.conn.execute(
+            f"""
+            DELETE FROM writes
+            WHERE NOT EXISTS (
+                SELECT 1 FROM checkpoints
+                WHERE checkpoints.thread_id = writes.thread_id
+                AND checkpoints.checkpoint_ns = writes.checkpoint_ns
+                AND checkpoints.checkpoint_id = writes.checkpoint_id
+            ) {thread_filter}
+            """,
+            params
+        )
+        saver.conn.commit()
+        saver.conn.execute("VACUUM")
+    return deleted
+
+
+def prune_blobs(saver: SqliteSaver, blob_store: BlobStore, min_age_seconds: float = BLOB_PRUNE_MIN_AGE_SECONDS) -> int:
+    """
+    Delete the blobs that no checkpoint of a SQLite checkpointer refers to.
+
+    Graph state only holds blob ids, so once `compact_checkpoints` has dropped the superseded
+    checkpoints, the contents they alone referred to (earlier accumulated content, the search
+    results of abandoned runs...) can go. The ids are found by scanning the serialized
+    checkpoints and pending writes for SHA-256 hashes. Blobs written in the last
+    `min_age_seconds` are kept, since runs in progress, or runs using the memory
+    checkpointer, may still need them.
+
+    Args:
+        saver: The SQLite checkpointer whose checkpoints decide which blobs are referenced.
+        blob_store: The blob store to prune.
+        min_age_seconds: Blobs stored more recently than this are always kept.
+
+    Returns:
+        The number of blobs that were deleted.
+    """
+    saver.setup()
+    keep_ids = set()
+    with saver.lock:
+        for query in ("SELECT checkpoint, metadata FROM checkpoints", "SELECT value, NULL FROM writes"):
+            for row in saver.conn.execute(query):
+                for value in row:
+                    if isinstance(value, (bytes, str)):
+                        data = value.encode("utf-8") if isinstance(value, str) else value
+                        keep_ids.update(match.decode("ascii") for match in _BLOB_ID_BYTES_PATTERN.findall(data))
+    return blob_store.prune(keep_ids, min_age_seconds)
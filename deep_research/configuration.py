@@ -1,18 +1,87 @@
-from dataclasses import dataclass, fields
+from dataclasses import dataclass, fields, replace
 from langchain_core.runnables import RunnableConfig
 import os
 from typing import Any
 
+
+# Providers supported by `init_llm`, recognised as the prefix of a "provider:model" override
+LLM_PROVIDERS = ("openai", "anthropic", "google", "ollama")
+
+def _coerce(value: Any, field_type: type) -> Any:
+    """Convert string values, e.g. from environment variables, to the type of the field."""
+    if not isinstance(value, str) or field_type is str:
+        return value
+    if field_type is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return field_type(value)
+
+
 @dataclass(kw_only=True)
 class Configuration:
 
+    thread_id: str = "default"
     provider: str = "openai"
     model: str = "gpt-4o-mini"
     temperature: float = 0.5
+    report_structure_planner_model: str = ""
+    section_formatter_model: str = ""
+    section_knowledge_model: str = ""
+    query_generator_model: str = ""
+    result_accumulator_model: str = ""
+    reflection_model: str = ""
+    final_section_formatter_model: str = ""
+    finalizer_model: str = ""
     max_queries: int = 3
     search_depth: int = 2
     num_reflections: int = 2
-    section_delay_seconds: int = 15
+    coverage_threshold: float = 0.8
+    auto_approve: bool = False
+    incremental_accumulation: bool = False
+    map_reduce_accumulation: bool = False
+    map_granularity: str = "query"
+    max_concurrent_map_calls: int = 4
+    map_token_budget: int = 8000
+    max_parallel_sections: int = 1
+    stream_tokens: bool = False
+    section_delay_seconds: int = 0
+    llm_requests_per_minute: int = 0
+    llm_tokens_per_minute: int = 0
+    search_requests_per_minute: int = 0
+    max_concurrent_llm_calls: int = 0
+    max_concurrent_searches: int = 0
+    max_search_workers: int = 4
+    search_timeout_seconds: int = 30
+    search_max_retries: int = 2
+    search_hedge_after_seconds: float = 0.0
+    llm_timeout_seconds: int = 300
+    llm_max_retries: int = 3
+    llm_hedge_after_seconds: float = 0.0
+    retry_backoff_seconds: float = 1.0
+    retry_max_backoff_seconds: float = 30.0
+    circuit_breaker_failures: int = 5
+    circuit_breaker_reset_seconds: int = 30
+    clean_search_content: bool = True
+    max_tokens_per_document: int = 4000
+    prompt_token_budget: int = 0
+    context_window_tokens: int = 0
+    reserved_output_tokens: int = 4096
+    blob_store_path: str = ".cache/blobs"
+    checkpointer: str = "memory"
+    checkpoint_path: str = ".cache/checkpoints.sqlite"
+    log_path: str = "logs/agent_logs.jsonl"
+    log_level: str = "INFO"
+    log_max_bytes: int = 10_000_000
+    log_backup_count: int = 5
+    log_max_field_chars: int = 2000
+    search_cache_enabled: bool = False
+    search_cache_path: str = ".cache/search_cache.sqlite"
+    search_cache_ttl_seconds: int = 7 * 24 * 60 * 60
+    search_cache_max_entries: int = 10000
+    search_offline: bool = False
+    llm_cache_enabled: bool = False
+    llm_cache_path: str = ".cache/llm_cache.sqlite"
+    llm_cache_ttl_seconds: int = 0
+    llm_cache_max_entries: int = 5000
     
     @classmethod
     def from_runnable_config(
@@ -25,9 +94,31 @@ class Configuration:
         )
 
         values: dict[str, Any] = {
-            f.name: os.environ.get(f.name.upper(), configurable.get(f.name, f.default))
+            f.name: _coerce(os.environ.get(f.name.upper(), configurable.get(f.name, f.default)), f.type)
             for f in fields(cls)
             if f.init
         }
 
-        return cls(**values)
\ No newline at end of file
+        return cls(**values)
+
+    def for_node(self, node: str) -> "Configuration":
+        """
+        Return the configuration an LLM node runs with, applying its model override if any.
+
+        The override is the `<node>_model` field, e.g. `query_generator_model`, given either
+        as a model name of the default provider ("gpt-4.1-nano") or as "provider:model"
+        ("ollama:llama3.1:8b"). Nodes without an override use `provider` and `model`.
+
+        Args:
+            node: The name of the node in the graph, e.g. "query_generator".
+
+        Returns:
+            The configuration with the provider and model of the node.
+        """
+        override = getattr(self, f"{node}_model", "")
+        if not override:
+            return self
+        provider, _, model = override.partition(":")
+        if provider in LLM_PROVIDERS and model:
+            return replace(self, provider=provider, model=model)
+        return replace(self, model=override)
@@ -0,0 +1,95 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .blobs import BlobStore, get_blob_store
+from .configuration import Configuration
+from .struct import SearchResult, SearchResults
+import threading
+
+
+class DocumentStore:
+    """
+    Content-addressed store for the raw content of search results.
+
+    Documents are kept in the blob store, keyed by the SHA-256 hash of their content, and each
+    URL is mapped to the document it was first stored with, so a page returned by several
+    queries is processed and stored only once. SearchResult objects hold the document id
+    instead of the text, which keeps the raw content out of the graph state and checkpoints.
+    """
+
+    def __init__(self, blob_store: BlobStore):
+        self._lock = threading.Lock()
+        self._blob_store = blob_store
+        self._urls: Dict[str, str] = {}
+
+    def document_id_for_url(self, url: str) -> Optional[str]:
+        """Return the id of the document already stored for `url`, if any."""
+        with self._lock:
+            return self._urls.get(url)
+
+    def put(self, url: str, content: str) -> str:
+        """Store the content of `url` and return its document id."""
+        document_id = self._blob_store.put(content)
+        with self._lock:
+            self._urls.setdefault(url, document_id)
+        return document_id
+
+    def get(self, document_id: str) -> str:
+        """Return the content of a document."""
+        return self._blob_store.get(document_id)
+
+
+SEARCH_RESULT_SEPARATOR = "\n\n---\n\n"
+
+_document_stores: Dict[str, DocumentStore] = {}
+_document_stores_lock = threading.Lock()
+
+
+def get_document_store(configurable: Configuration) -> DocumentStore:
+    """Return the document store of a run, identified by its thread id, creating it on first use."""
+    with _document_stores_lock:
+        if configurable.thread_id not in _document_stores:
+            _document_stores[configurable.thread_id] = DocumentStore(get_blob_store(configurable.blob_store_path))
+        return _document_stores[configurable.thread_id]
+
+
+def clear_document_store(thread_id: str):
+    """Forget the document store of a finished run; its documents stay in the blob store."""
+    with _document_stores_lock:
+        _document_stores.pop(thread_id, None)
+
+
+def format_search_result_blocks(
+        search_results: List[SearchResults],
+        document_store: DocumentStore,
+        exclude_document_ids: Iterable[str] = ()
+) -> List[str]:
+    """
+    Render search results as text blocks for a prompt, resolving their documents from the store.
+
+    Each document is included once, under the first query that returned it; documents in
+    `exclude_document_ids` (e.g. already synthesized in an earlier round) are left out. The
+    blocks keep the order of the queries and of the results of each query.
+    """
+    return [
+        f"Query: {search_result.query.query}\n"
+        f"Title: {result.title}\n"
+        f"URL: {result.url}\n"
+        f"Content: {document_store.get(result.document_id)}"
+        for search_result, result in _unique_results(search_results, exclude_document_ids)
+    ]
+
+
+def unique_document_ids(search_results: List[SearchResults], exclude_document_ids: Iterable[str] = ()) -> List[str]:
+    """Return the ids of the documents `format_search_result_blocks` renders, in the order of its blocks."""
+    return [result.document_id for _, result in _unique_results(search_results, exclude_document_ids)]
+
+
+def _unique_results(
+        search_results: List[SearchResults],
+        exclude_document_ids: Iterable[str]
+) -> Iterator[Tuple[SearchResults, SearchResult]]:
+    seen_document_ids = set(exclude_document_ids)
+    for search_result in search_results:
+        for result in search_result.results:
+            if result.document_id not in seen_document_ids:
+                seen_document_ids.add(result.document_id)
+                yield search_result, result
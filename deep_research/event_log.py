@@ -0,0 +1,138 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from langchain_core.messages import BaseMessage
+from pydantic import BaseModel
+from typing import Any
+from .configuration import Configuration
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+
+
+# Lists longer than this are cut down to their first items
+MAX_LIST_ITEMS = 50
+
+
+def sanitize(value: Any, max_field_chars: int) -> Any:
+    """
+    Turn a graph event into JSON-safe data of bounded size.
+
+    Pydantic models and messages are converted to dicts, strings longer than
+    `max_field_chars` are truncated and tagged with their length and SHA-256 hash, and long
+    lists keep their first `MAX_LIST_ITEMS` items.
+    """
+    if isinstance(value, str):
+        if max_field_chars <= 0 or len(value) <= max_field_chars:
+            return value
+        digest = hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+        return f"{value[:max_field_chars]}...[truncated {len(value)} chars, sha256={digest}]"
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, BaseMessage):
+        return {"type": value.type, "content": sanitize(value.content, max_field_chars)}
+    if isinstance(value, BaseModel):
+        return sanitize(value.model_dump(), max_field_chars)
+    if isinstance(value, dict):
+        return {str(key): sanitize(item, max_field_chars) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        items = [sanitize(item, max_field_chars) for item in list(value)[:MAX_LIST_ITEMS]]
+        if len(value) > MAX_LIST_ITEMS:
+            items.append(f"...[{len(value) - MAX_LIST_ITEMS} more items]")
+        return items
+    return sanitize(repr(value), max_field_chars)
+
+
+class _JSONLinesFormatter(logging.Formatter):
+    def __init__(self, max_field_chars: int):
+        super().__init__()
+        self.max_field_chars = max_field_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "event": record.msg,
+            **sanitize(getattr(record, "fields", {}), self.max_field_chars)
+        }, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue records untouched, so serialization happens on the writer thread rather than the caller's."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class EventLogger:
+    """
+    Structured JSONL event log written by a background thread.
+
+    Callers only filter by level and enqueue the event; converting it to JSON, bounding its
+    fields and writing it happen on the writer thread. The file is rotated once it reaches
+    `max_bytes`, keeping `backup_count` old files.
+    """
+
+    def __init__(self, path: str, level: str = "INFO", max_bytes: int = 10_000_000, backup_count: int = 5, max_field_chars: int = 2000):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        file_handler.setFormatter(_JSONLinesFormatter(max_field_chars))
+
+        self._closed = False
+        self._queue: queue.Queue = queue.Queue()
+        self._listener = QueueListener(self._queue, file_handler)
+        self._listener.start()
+
+        self._logger = logging.getLogger(f"deep_research.events.{os.path.abspath(path)}")
+        self._logger.setLevel(level.upper())
+        self._logger.propagate = False
+        self._logger.handlers = [_DeferredQueueHandler(self._queue)]
+
+    def log(self, event: str, level: str = "INFO", **fields):
+        """Queue an event with its fields, if `level` is enabled."""
+        level_number = logging.getLevelName(level.upper())
+        if self._logger.isEnabledFor(level_number):
+            self._logger.log(level_number, event, extra={"fields": fields})
+
+    def debug(self, event: str, **fields):
+        self.log(event, "DEBUG", **fields)
+
+    def info(self, event: str, **fields):
+        self.log(event, "INFO", **fields)
+
+    def warning(self, event: str, **fields):
+        self.log(event, "WARNING", **fields)
+
+    def error(self, event: str, **fields):
+        self.log(event, "ERROR", **fields)
+
+    def close(self):
+        """Write out the queued events and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+
+
+@lru_cache(maxsize=None)
+def _get_event_logger(path: str, level: str, max_bytes: int, backup_count: int, max_field_chars: int) -> EventLogger:
+    event_logger = EventLogger(path, level, max_bytes, backup_count, max_field_chars)
+    atexit.register(event_logger.close)
+    return event_logger
+
+
+def get_event_logger(configurable: Configuration) -> EventLogger:
+    """Return the process-wide event logger for the log settings of the configuration."""
+    return _get_event_logger(
+        configurable.log_path,
+        configurable.log_level,
+        configurable.log_max_bytes,
+        configurable.log_backup_count,
+        configurable.log_max_field_chars
+    )
@@ -1,54 +1,148 @@
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Dict
+import asyncio
+import time
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
-from .state import AgentState, ResearchState
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from .checkpoint import aget_checkpointer, get_checkpointer, memory_saver
+from .configuration import Configuration
+from .metrics import instrument_node
+from .rate_limiter import concurrency_limiter
+from .state import AgentState, ResearchState, SectionSearchOutput
 from .struct import SectionOutput
 from .nodes import (
     report_structure_planner_node,
+    areport_structure_planner_node,
     human_feedback_node,
     section_formatter_node,
+    asection_formatter_node,
     section_knowledge_node,
+    asection_knowledge_node,
     query_generator_node,
+    aquery_generator_node,
     tavily_search_node,
+    atavily_search_node,
     result_accumulator_node,
+    aresult_accumulator_node,
     reflection_feedback_node,
+    areflection_feedback_node,
     final_section_formatter_node,
+    afinal_section_formatter_node,
     queue_next_section_node,
-    finalizer_node
+    aqueue_next_section_node,
+    finalizer_node,
+    afinalizer_node
 )
 
 
+def _node(name: str, func, afunc) -> RunnableLambda:
+    """
+    Wrap the sync and async implementations of a node, so the graph runs natively under both
+    invoke/stream and ainvoke/astream, and every execution is recorded in the run's metrics.
+    """
+    return RunnableLambda(instrument_node(name, func), afunc=instrument_node(name, afunc), name=name)
+
+
+# <<< ----- SECTION SEARCH ----- >>>
+
+# The query generation, search, accumulation and reflection loop of a section
+section_search_builder = StateGraph(ResearchState, output=SectionSearchOutput)
+
+section_search_builder.add_node("query_generator", _node("query_generator", query_generator_node, aquery_generator_node))
+section_search_builder.add_node("tavily_search", _node("tavily_search", tavily_search_node, atavily_search_node))
+section_search_builder.add_node("result_accumulator", _node("result_accumulator", result_accumulator_node, aresult_accumulator_node))
+section_search_builder.add_node(
+    "reflection",
+    _node("reflection", reflection_feedback_node, areflection_feedback_node),
+    destinations=(END, "query_generator")
+)
+
+section_search_builder.add_edge(START, "query_generator")
+section_search_builder.add_edge("query_generator", "tavily_search")
+section_search_builder.add_edge("tavily_search", "result_accumulator")
+section_search_builder.add_edge("result_accumulator", "reflection")
+
+
 # <<< ----- RESEARCH AGENT ----- >>>
 
+# The internal knowledge of a section does not depend on its searches, so it is generated
+# alongside the whole search loop and only joined when the section is written
 research_builder = StateGraph(ResearchState, output=SectionOutput)
 
-research_builder.add_node("section_knowledge", section_knowledge_node)
-research_builder.add_node("query_generator", query_generator_node)
-research_builder.add_node("tavily_search", tavily_search_node)
-research_builder.add_node("result_accumulator", result_accumulator_node)
-research_builder.add_node("reflection", reflection_feedback_node)
-research_builder.add_node("final_section_formatter", final_section_formatter_node)
+research_builder.add_node("section_knowledge", _node("section_knowledge", section_knowledge_node, asection_knowledge_node))
+research_builder.add_node("section_search", section_search_builder.compile())
+research_builder.add_node("final_section_formatter", _node("final_section_formatter", final_section_formatter_node, afinal_section_formatter_node))
 
 research_builder.add_edge(START, "section_knowledge")
-research_builder.add_edge("section_knowledge", "query_generator")
-research_builder.add_edge("query_generator", "tavily_search")
-research_builder.add_edge("tavily_search", "result_accumulator")
-research_builder.add_edge("result_accumulator", "reflection")
+research_builder.add_edge(START, "section_search")
+research_builder.add_edge(["section_knowledge", "section_search"], "final_section_formatter")
 research_builder.add_edge("final_section_formatter", END)
 
+research_graph = research_builder.compile()
 
 
-# <<< ----- MAIN AGENT ----- >>>
+def _section_slot_key(config: RunnableConfig) -> str:
+    return f"sections:{config.get('configurable', {}).get('thread_id', 'default')}"
+
+
+def _start_section(state: ResearchState, configurable: Configuration) -> float:
+    """Announce a section and return the delay to wait before researching it."""
+    section_index = state["current_section_index"]
+    print(f"Processing section {section_index + 1}: {state['section'].section_name}")
+    if section_index > 0 and configurable.section_delay_seconds > 0:
+        print(f"Waiting {configurable.section_delay_seconds} seconds before processing next section to avoid rate limits...")
+        return configurable.section_delay_seconds
+    return 0
+
+
+def research_agent_node(state: ResearchState, config: RunnableConfig) -> Dict:
+    """
+    Research one section with the research subgraph, once one of the run's
+    `max_parallel_sections` slots is free.
+
+    Every section is dispatched at once, and the slots are handed out in FIFO order as the
+    running sections finish, so the concurrency stays at `max_parallel_sections` throughout
+    instead of waiting for the slowest section of a batch.
+    """
+    configurable = Configuration.from_runnable_config(config)
+    with concurrency_limiter.slot(_section_slot_key(config), max(configurable.max_parallel_sections, 1)):
+        section_delay = _start_section(state, configurable)
+        if section_delay:
+            time.sleep(section_delay)
+        return research_graph.invoke(state, config)
 
-memory_saver = MemorySaver()
+
+async def aresearch_agent_node(state: ResearchState, config: RunnableConfig) -> Dict:
+    """Async version of `research_agent_node`, waiting for a slot without blocking the event loop."""
+    configurable = Configuration.from_runnable_config(config)
+    async with concurrency_limiter.aslot(_section_slot_key(config), max(configurable.max_parallel_sections, 1)):
+        section_delay = _start_section(state, configurable)
+        if section_delay:
+            await asyncio.sleep(section_delay)
+        return await research_graph.ainvoke(state, config)
+
+
+# <<< ----- MAIN AGENT ----- >>>
 
 builder = StateGraph(AgentState)
 
-builder.add_node("report_structure_planner", report_structure_planner_node)
-builder.add_node("human_feedback", human_feedback_node)
-builder.add_node("section_formatter", section_formatter_node)
-builder.add_node("queue_next_section", queue_next_section_node)
-builder.add_node("research_agent", research_builder.compile())
-builder.add_node("finalizer", finalizer_node)
+builder.add_node("report_structure_planner", _node("report_structure_planner", report_structure_planner_node, areport_structure_planner_node))
+builder.add_node("human_feedback", instrument_node("human_feedback", human_feedback_node))
+builder.add_node(
+    "section_formatter",
+    _node("section_formatter", section_formatter_node, asection_formatter_node),
+    destinations=("queue_next_section",)
+)
+builder.add_node(
+    "queue_next_section",
+    _node("queue_next_section", queue_next_section_node, aqueue_next_section_node),
+    destinations=("research_agent", "finalizer")
+)
+builder.add_node("research_agent", RunnableLambda(research_agent_node, afunc=aresearch_agent_node, name="research_agent"))
+builder.add_node("finalizer", _node("finalizer", finalizer_node, afinalizer_node))
 
 builder.set_entry_point("report_structure_planner")
 builder.add_edge("report_structure_planner", "human_feedback")
@@ -56,4 +150,29 @@ builder.add_edge("section_formatter", "queue_next_section")
 builder.add_edge("research_agent", "queue_next_section")
 builder.add_edge("finalizer", END)
 
-agent_graph = builder.compile(checkpointer=memory_saver)
\ No newline at end of file
+agent_graph = builder.compile(checkpointer=memory_saver)
+
+
+@lru_cache(maxsize=None)
+def _compile_agent_graph(checkpointer: BaseCheckpointSaver) -> CompiledStateGraph:
+    return builder.compile(checkpointer=checkpointer)
+
+
+def get_agent_graph(configurable: Configuration) -> CompiledStateGraph:
+    """Return the main agent graph compiled with the checkpointer selected in the configuration."""
+    checkpointer = get_checkpointer(configurable)
+    if checkpointer is memory_saver:
+        return agent_graph
+    return _compile_agent_graph(checkpointer)
+
+
+@asynccontextmanager
+async def aget_agent_graph(configurable: Configuration) -> AsyncIterator[CompiledStateGraph]:
+    """
+    Async version of `get_agent_graph`, for driving the graph with ainvoke/astream.
+
+    The graph is compiled with the async checkpointer selected in the configuration, which
+    is only usable while the context is open.
+    """
+    async with aget_checkpointer(configurable) as checkpointer:
+        yield agent_graph if checkpointer is memory_saver else builder.compile(checkpointer=checkpointer)
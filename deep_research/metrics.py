@@ -0,0 +1,292 @@
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from langchain_core.runnables import RunnableConfig
+from langgraph.errors import GraphInterrupt
+from typing import Dict, List, Optional
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+
+
+# USD per million input and output tokens, used to estimate the cost of a run
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "o3-mini": (1.10, 4.40),
+    "claude-3-5-haiku-latest": (0.80, 4.00),
+    "claude-3-5-sonnet-latest": (3.00, 15.00),
+    "claude-3-7-sonnet-latest": (3.00, 15.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+}
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Estimate the cost in USD of a call to `model`, 0 for models without a known price."""
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+@dataclass
+class NodeSpan:
+    """The measurements of one execution of a graph node."""
+    thread_id: str
+    node: str
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    section_index: Optional[int] = None
+    reflection_round: Optional[int] = None
+    start_time: float = field(default_factory=time.time)
+    end_time: Optional[float] = None
+    wall_seconds: float = 0.0
+    rate_limit_wait_seconds: float = 0.0
+    llm_calls: int = 0
+    llm_cache_hits: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    tavily_calls: int = 0
+    search_cache_hits: int = 0
+    trimmed_prompt_tokens: int = 0
+    prompt_trims: List[str] = field(default_factory=list)
+    status: str = "ok"
+    error: Optional[str] = None
+
+    def to_otel(self) -> Dict:
+        """Return the span in the OpenTelemetry JSON span format."""
+        attributes = {
+            "deep_research.thread_id": self.thread_id,
+            "deep_research.section_index": self.section_index,
+            "deep_research.reflection_round": self.reflection_round,
+            "deep_research.rate_limit_wait_seconds": self.rate_limit_wait_seconds,
+            "deep_research.llm_calls": self.llm_calls,
+            "deep_research.llm_cache_hits": self.llm_cache_hits,
+            "gen_ai.usage.input_tokens": self.input_tokens,
+            "gen_ai.usage.output_tokens": self.output_tokens,
+            "deep_research.cost_usd": self.cost_usd,
+            "deep_research.tavily_calls": self.tavily_calls,
+            "deep_research.search_cache_hits": self.search_cache_hits,
+            "deep_research.trimmed_prompt_tokens": self.trimmed_prompt_tokens,
+            "deep_research.prompt_trims": "; ".join(self.prompt_trims) or None,
+        }
+        return {
+            "traceId": hashlib.sha256(self.thread_id.encode("utf-8")).hexdigest()[:32],
+            "spanId": self.span_id,
+            "name": self.node,
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": str(int(self.start_time * 1e9)),
+            "endTimeUnixNano": str(int((self.end_time or self.start_time) * 1e9)),
+            "attributes": [
+                {"key": key, "value": {"doubleValue": value} if isinstance(value, float) else {"intValue": str(value)} if isinstance(value, int) else {"stringValue": str(value)}}
+                for key, value in attributes.items() if value is not None
+            ],
+            "status": {"code": "STATUS_CODE_ERROR", "message": self.error} if self.status == "error" else {"code": "STATUS_CODE_OK"},
+        }
+
+
+class MetricsRecorder:
+    """
+    Process-wide store of the node spans of every run, keyed by thread id.
+
+    Nodes wrapped with `instrument_node` open a span for each execution; the LLM and search
+    helpers add their waits, tokens and calls to the span of the node they run in.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans: Dict[str, List[NodeSpan]] = {}
+
+    def add(self, span: NodeSpan):
+        with self._lock:
+            self._spans.setdefault(span.thread_id, []).append(span)
+
+    def spans(self, thread_id: str) -> List[NodeSpan]:
+        """Return the finished spans of a run in the order they ended."""
+        with self._lock:
+            return list(self._spans.get(thread_id, []))
+
+    def clear(self, thread_id: str):
+        """Forget the spans of a run."""
+        with self._lock:
+            self._spans.pop(thread_id, None)
+
+    def summary(self, thread_id: str) -> Dict[str, Dict]:
+        """Return the totals of a run per node, plus a "total" row."""
+        summary: Dict[str, Dict] = {}
+        for span in self.spans(thread_id):
+            for key in (span.node, "total"):
+                row = summary.setdefault(key, {
+                    "runs": 0, "wall_seconds": 0.0, "rate_limit_wait_seconds": 0.0, "llm_calls": 0, "llm_cache_hits": 0,
+                    "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "tavily_calls": 0, "search_cache_hits": 0, "trimmed_prompt_tokens": 0, "errors": 0
+                })
+                row["runs"] += 1
+                row["wall_seconds"] += span.wall_seconds
+                row["rate_limit_wait_seconds"] += span.rate_limit_wait_seconds
+                row["llm_calls"] += span.llm_calls
+                row["llm_cache_hits"] += span.llm_cache_hits
+                row["input_tokens"] += span.input_tokens
+                row["output_tokens"] += span.output_tokens
+                row["cost_usd"] += span.cost_usd
+                row["tavily_calls"] += span.tavily_calls
+                row["search_cache_hits"] += span.search_cache_hits
+                row["trimmed_prompt_tokens"] += span.trimmed_prompt_tokens
+                row["errors"] += span.status == "error"
+        if "total" in summary:
+            summary["total"] = summary.pop("total")
+        return summary
+
+    def summary_table(self, thread_id: str) -> str:
+        """Render the per-node totals of a run as a text table."""
+        header = f"{'node':<26}{'runs':>6}{'wall s':>10}{'wait s':>9}{'llm':>6}{'in tok':>10}{'out tok':>9}{'cost $':>10}{'tavily':>8}{'trimmed':>9}"
+        lines = [header, "-" * len(header)]
+        for node, row in self.summary(thread_id).items():
+            if node == "total":
+                lines.append("-" * len(header))
+            lines.append(
+                f"{node:<26}{row['runs']:>6}{row['wall_seconds']:>10.2f}{row['rate_limit_wait_seconds']:>9.2f}{row['llm_calls']:>6}"
+                f"{row['input_tokens']:>10}{row['output_tokens']:>9}{row['cost_usd']:>10.4f}{row['tavily_calls']:>8}{row['trimmed_prompt_tokens']:>9}"
+            )
+        return "\n".join(lines)
+
+    def export_jsonl(self, path: str, thread_id: str):
+        """Append the spans of a run to a JSONL file, one span per line."""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for span in self.spans(thread_id):
+                f.write(json.dumps(asdict(span)) + "\n")
+
+    def export_otel(self, path: str, thread_id: str):
+        """Write the spans of a run as an OpenTelemetry JSON trace (the OTLP/JSON `resourceSpans` layout)."""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        trace = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "deep-research"}}]},
+                "scopeSpans": [{"scope": {"name": "deep_research"}, "spans": [span.to_otel() for span in self.spans(thread_id)]}],
+            }]
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+
+
+metrics = MetricsRecorder()
+
+_current_span: ContextVar[Optional[NodeSpan]] = ContextVar("deep_research_current_span", default=None)
+_span_lock = threading.Lock()
+
+
+def _open_span(node: str, state: Dict, config: RunnableConfig) -> NodeSpan:
+    thread_id = (config or {}).get("configurable", {}).get("thread_id", "default")
+    # Only the research subgraph works on a single section
+    in_section = isinstance(state, dict) and "section" in state
+    return NodeSpan(
+        thread_id=thread_id,
+        node=node,
+        section_index=state.get("current_section_index") if in_section else None,
+        reflection_round=state.get("reflection_count", 1) if in_section else None,
+    )
+
+
+def _close_span(span: NodeSpan, started_at: float, error: Optional[BaseException] = None):
+    span.end_time = time.time()
+    span.wall_seconds = time.monotonic() - started_at
+    if isinstance(error, GraphInterrupt):
+        span.status = "interrupted"
+    elif error is not None:
+        span.status = "error"
+        span.error = f"{type(error).__name__}: {error}"
+    metrics.add(span)
+
+
+def instrument_node(name: str, func):
+    """
+    Wrap a sync or async node function so that each execution records a span in `metrics`.
+
+    The span is the current span while the node runs, so LLM and search calls made by the
+    node, including from worker threads started with a copy of the context, are added to it.
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(state, config: RunnableConfig):
+            span = _open_span(name, state, config)
+            token = _current_span.set(span)
+            started_at = time.monotonic()
+            try:
+                result = await func(state, config)
+            except BaseException as e:
+                _close_span(span, started_at, e)
+                raise
+            finally:
+                _current_span.reset(token)
+            _close_span(span, started_at)
+            return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(state, config: RunnableConfig):
+        span = _open_span(name, state, config)
+        token = _current_span.set(span)
+        started_at = time.monotonic()
+        try:
+            result = func(state, config)
+        except BaseException as e:
+            _close_span(span, started_at, e)
+            raise
+        finally:
+            _current_span.reset(token)
+        _close_span(span, started_at)
+        return result
+    return wrapper
+
+
+def record_llm_call(model: str, input_tokens: int, output_tokens: int, wait_seconds: float):
+    """Add an LLM call to the current span, if any."""
+    span = _current_span.get()
+    if span is None:
+        return
+    with _span_lock:
+        span.llm_calls += 1
+        span.input_tokens += input_tokens
+        span.output_tokens += output_tokens
+        span.cost_usd += estimate_cost(model, input_tokens, output_tokens)
+        span.rate_limit_wait_seconds += wait_seconds
+
+
+def record_llm_cache_hit():
+    """Add an LLM call answered from the cache to the current span, if any."""
+    span = _current_span.get()
+    if span is not None:
+        with _span_lock:
+            span.llm_cache_hits += 1
+
+
+def record_search(wait_seconds: float = 0.0, cached: bool = False):
+    """Add a search to the current span, if any, as a Tavily call or a search cache hit."""
+    span = _current_span.get()
+    if span is None:
+        return
+    with _span_lock:
+        if cached:
+            span.search_cache_hits += 1
+        else:
+            span.tavily_calls += 1
+            span.rate_limit_wait_seconds += wait_seconds
+
+
+def record_prompt_trim(description: str, tokens: int):
+    """Add a prompt input trimmed to fit the token budget to the current span, if any."""
+    span = _current_span.get()
+    if span is None:
+        return
+    with _span_lock:
+        span.trimmed_prompt_tokens += tokens
+        span.prompt_trims.append(description)
@@ -6,34 +6,57 @@ from langchain_core.prompts import (
     MessagesPlaceholder
 )
 from langchain_core.messages import HumanMessage
-from langgraph.types import Command, Send
-from typing import Literal, Dict
-from tavily import TavilyClient
+from langgraph.graph import END
+from langgraph.types import Command, Send, interrupt
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+from typing import Iterable, Literal, Dict, List, Optional, Tuple
 from .state import AgentState, ResearchState
 from .configuration import Configuration
-from .utils import init_llm
+from .utils import invoke_llm, ainvoke_llm
+from .search import search_queries, asearch_queries
+from .documents import get_document_store, format_search_result_blocks, unique_document_ids, SEARCH_RESULT_SEPARATOR
+from .budget import PromptInput, fit_prompt_inputs
+from .blobs import get_blob_store
 from .prompts import (
     REPORT_STRUCTURE_PLANNER_SYSTEM_PROMPT_TEMPLATE,
     SECTION_FORMATTER_SYSTEM_PROMPT_TEMPLATE,
     SECTION_KNOWLEDGE_SYSTEM_PROMPT_TEMPLATE,
     QUERY_GENERATOR_SYSTEM_PROMPT_TEMPLATE,
     RESULT_ACCUMULATOR_SYSTEM_PROMPT_TEMPLATE,
+    RESULT_REDUCER_SYSTEM_PROMPT_TEMPLATE,
     REFLECTION_FEEDBACK_SYSTEM_PROMPT_TEMPLATE,
     FINAL_SECTION_FORMATTER_SYSTEM_PROMPT_TEMPLATE,
     FINALIZER_SYSTEM_PROMPT_TEMPLATE
 )
 from .struct import (
+    SearchResults,
+    Section,
     Sections,
     Queries,
-    SearchResult,
-    SearchResults,
+    SectionContent,
     Feedback,
     ConclusionAndReferences
 )
-import time
+import asyncio
+import contextvars
+import threading
 import os
 
 
+# Prompt templates are built once at import time and shared by every invocation of their node
+REPORT_STRUCTURE_PLANNER_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(REPORT_STRUCTURE_PLANNER_SYSTEM_PROMPT_TEMPLATE),
+    HumanMessagePromptTemplate.from_template(
+        template="""
+        Topic: {topic}
+        Outline: {outline}
+        """
+    ),
+    MessagesPlaceholder(variable_name="messages")
+])
+
+
 def report_structure_planner_node(state: AgentState, config: RunnableConfig) -> Dict:
     """
     Plans and generates the initial structure of a research report based on a given topic and outline.
@@ -49,31 +72,23 @@ def report_structure_planner_node(state: AgentState, config: RunnableConfig) ->
     Returns:
         Dict: A dictionary containing the 'messages' key with the LLM's response about the report structure
     """
-    configurable = Configuration.from_runnable_config(config)
+    configurable = Configuration.from_runnable_config(config).for_node("report_structure_planner")
 
-    llm = init_llm(
-        provider=configurable.provider,
-        model=configurable.model,
-        temperature=configurable.temperature
-    )
+    result = invoke_llm(REPORT_STRUCTURE_PLANNER_PROMPT, state, configurable)
+    return {"messages": [result]}
 
-    report_structure_planner_system_prompt = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(REPORT_STRUCTURE_PLANNER_SYSTEM_PROMPT_TEMPLATE),
-        HumanMessagePromptTemplate.from_template(
-            template="""
-            Topic: {topic}
-            Outline: {outline}
-            """
-        ),
-        MessagesPlaceholder(variable_name="messages")
-    ])
 
-    report_structure_planner_llm = report_structure_planner_system_prompt | llm
+async def areport_structure_planner_node(state: AgentState, config: RunnableConfig) -> Dict:
+    """Async version of `report_structure_planner_node`."""
+    configurable = Configuration.from_runnable_config(config).for_node("report_structure_planner")
 
-    result = report_structure_planner_llm.invoke(state)
+    result = await ainvoke_llm(REPORT_STRUCTURE_PLANNER_PROMPT, state, configurable)
     return {"messages": [result]}
 
 
+HUMAN_FEEDBACK_QUESTION = "Please provide feedback on the report structure (type 'continue' to continue): "
+
+
 def human_feedback_node(
         state: AgentState, 
         config: RunnableConfig
@@ -81,22 +96,30 @@ def human_feedback_node(
     """
     Handles human feedback on the generated report structure.
 
-    This node prompts the user for feedback on the report structure and processes their response.
-    If the user types 'continue', it proceeds to format the sections. Otherwise, it returns to the
-    report structure planner with the feedback for revision.
+    This node pauses the run with a LangGraph interrupt carrying the report structure and the
+    question to ask. The run is checkpointed and no worker is held while it waits; it resumes
+    when the feedback is submitted with `Command(resume=feedback)`. If the feedback is
+    'continue', it proceeds to format the sections. Otherwise, it returns to the report
+    structure planner with the feedback for revision.
+
+    With `auto_approve` set, the structure is approved without interrupting the run.
 
     Args:
         state (AgentState): The current state containing the generated report structure messages
-        config (RunnableConfig): Configuration object (unused in this node)
+        config (RunnableConfig): Configuration object containing the auto-approve setting
 
     Returns:
         Command: A Command object directing the flow either to:
             - "section_formatter" with the approved report structure
             - "report_structure_planner" with feedback for revision
     """
-    
-    human_message = input("Please provide feedback on the report structure (type 'continue' to continue): ")
+    configurable = Configuration.from_runnable_config(config)
     report_structure = state.get("messages")[-1].content
+
+    if configurable.auto_approve:
+        return Command(goto="section_formatter", update={"report_structure": report_structure})
+
+    human_message = interrupt({"question": HUMAN_FEEDBACK_QUESTION, "report_structure": report_structure})
     if human_message == "continue":
         return Command(
             goto="section_formatter",
@@ -109,6 +132,12 @@ def human_feedback_node(
         )
     
 
+SECTION_FORMATTER_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(SECTION_FORMATTER_SYSTEM_PROMPT_TEMPLATE),
+    HumanMessagePromptTemplate.from_template(template="{report_structure}"),
+])
+
+
 def section_formatter_node(state: AgentState, config: RunnableConfig) -> Command[Literal["queue_next_section"]]:
     """
     Formats the report structure into discrete sections for processing.
@@ -127,21 +156,30 @@ def section_formatter_node(state: AgentState, config: RunnableConfig) -> Command
             - current_section_index: Initialized to 0 to begin processing
     """
 
-    configurable = Configuration.from_runnable_config(config)
-    llm = init_llm(
-        provider=configurable.provider,
-        model=configurable.model,
-        temperature=configurable.temperature
-    )
+    configurable = Configuration.from_runnable_config(config).for_node("section_formatter")
+
+    result = invoke_llm(SECTION_FORMATTER_PROMPT, _section_formatter_inputs(state, configurable), configurable, schema=Sections)
+    return _section_formatter_command(result)
+
+
+async def asection_formatter_node(state: AgentState, config: RunnableConfig) -> Command[Literal["queue_next_section"]]:
+    """Async version of `section_formatter_node`."""
+    configurable = Configuration.from_runnable_config(config).for_node("section_formatter")
 
-    section_formatter_system_prompt = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(SECTION_FORMATTER_SYSTEM_PROMPT_TEMPLATE),
-        HumanMessagePromptTemplate.from_template(template="{report_structure}"),
-    ])
-    section_formatter_llm = section_formatter_system_prompt | llm.with_structured_output(Sections)
+    result = await ainvoke_llm(SECTION_FORMATTER_PROMPT, _section_formatter_inputs(state, configurable), configurable, schema=Sections)
+    return await asyncio.to_thread(_section_formatter_command, result)
 
-    result = section_formatter_llm.invoke(state)
 
+def _section_formatter_inputs(state: AgentState, configurable: Configuration) -> Dict:
+    return fit_prompt_inputs(
+        SECTION_FORMATTER_PROMPT,
+        state,
+        configurable,
+        [PromptInput("report_structure", [state["report_structure"]], priority=0)]
+    )
+
+
+def _section_formatter_command(result: Sections) -> Command:
     with open("logs/sections.json", "w", encoding="utf-8") as f:
         f.write(result.model_dump_json())
     
@@ -157,43 +195,57 @@ def section_formatter_node(state: AgentState, config: RunnableConfig) -> Command
 
 def queue_next_section_node(state: AgentState, config: RunnableConfig) -> Command[Literal["research_agent", "finalizer"]]:
     """
-    Manages the sequential processing of report sections with rate limiting.
+    Manages the processing of report sections, optionally researching several sections concurrently.
 
     This node controls the flow of section processing by:
-    1. Tracking the current section index
-    2. Implementing delays between sections to avoid rate limits
-    3. Routing sections to the research agent for processing
-    4. Transitioning to report finalization when all sections are complete
+    1. Dispatching every section not yet dispatched to the research agent at once
+    2. Transitioning to report finalization when all sections are complete
+
+    The research agent holds one of the run's `max_parallel_sections` slots while it researches
+    a section (see `research_agent_node` in the graph module), so a new section starts as soon
+    as any running one finishes. With the default `max_parallel_sections` of 1 the sections are
+    processed one after another.
 
     Args:
         state (AgentState): The current state containing sections and section index
-        config (RunnableConfig): Configuration object containing delay settings
+        config (RunnableConfig): Configuration object
 
     Returns:
         Command: A Command object directing flow to either:
-            - "research_agent" with the next section to process
+            - "research_agent" with one Send per remaining section
             - "finalizer" when all sections are complete
     """
-    configurable = Configuration.from_runnable_config(config)
-    
-    if state["current_section_index"] < len(state["sections"]):
-        current_section = state["sections"][state["current_section_index"]]
-        
-        if state["current_section_index"] > 0:
-            print(f"Waiting {configurable.section_delay_seconds} seconds before processing next section to avoid rate limits...")
-            time.sleep(configurable.section_delay_seconds)
-            
-        print(f"Processing section {state['current_section_index'] + 1}/{len(state['sections'])}: {current_section.section_name}")
-        
+    return _queue_next_section_command(state)
+
+
+async def aqueue_next_section_node(state: AgentState, config: RunnableConfig) -> Command[Literal["research_agent", "finalizer"]]:
+    """Async version of `queue_next_section_node`."""
+    return _queue_next_section_command(state)
+
+
+def _queue_next_section_command(state: AgentState) -> Command:
+    sections = state["sections"]
+    start_index = state["current_section_index"]
+
+    if start_index < len(sections):
         return Command(
-            update={"current_section_index": state["current_section_index"] + 1},
-            goto=Send("research_agent", {"section": current_section, "current_section_index": state["current_section_index"]})
+            update={"current_section_index": len(sections)},
+            goto=[
+                Send("research_agent", {"section": sections[section_index], "current_section_index": section_index})
+                for section_index in range(start_index, len(sections))
+            ]
         )
     else:
-        print(f"All {len(state['sections'])} sections have been processed. Generating final report...")
+        print(f"All {len(sections)} sections have been processed. Generating final report...")
         return Command(goto="finalizer")
 
 
+SECTION_KNOWLEDGE_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(SECTION_KNOWLEDGE_SYSTEM_PROMPT_TEMPLATE),
+    HumanMessagePromptTemplate.from_template(template="{section}"),
+])
+
+
 def section_knowledge_node(state: ResearchState, config: RunnableConfig):
     """
     Generates initial knowledge and understanding about a section before conducting research.
@@ -208,24 +260,30 @@ def section_knowledge_node(state: ResearchState, config: RunnableConfig):
 
     Returns:
         dict: A dictionary containing the generated knowledge with key:
-            - knowledge (str): The LLM-generated understanding and context for the section
+            - knowledge_id (str): The blob id of the LLM-generated understanding and context for the section
     """
-    configurable = Configuration.from_runnable_config(config)
-    llm = init_llm(
-        provider=configurable.provider,
-        model=configurable.model,
-        temperature=configurable.temperature
-    )
+    configurable = Configuration.from_runnable_config(config).for_node("section_knowledge")
+
+    result = invoke_llm(SECTION_KNOWLEDGE_PROMPT, state, configurable)
+
+    return {"knowledge_id": get_blob_store(configurable.blob_store_path).put(result.content)}
 
-    section_knowledge_system_prompt = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(SECTION_KNOWLEDGE_SYSTEM_PROMPT_TEMPLATE),
-        HumanMessagePromptTemplate.from_template(template="{section}"),
-    ])
-    section_knowledge_llm = section_knowledge_system_prompt | llm
 
-    result = section_knowledge_llm.invoke(state)
+async def asection_knowledge_node(state: ResearchState, config: RunnableConfig):
+    """Async version of `section_knowledge_node`."""
+    configurable = Configuration.from_runnable_config(config).for_node("section_knowledge")
 
-    return {"knowledge": result.content}
+    result = await ainvoke_llm(SECTION_KNOWLEDGE_PROMPT, state, configurable)
+
+    return {"knowledge_id": await get_blob_store(configurable.blob_store_path).aput(result.content)}
+
+
+QUERY_GENERATOR_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(QUERY_GENERATOR_SYSTEM_PROMPT_TEMPLATE),
+    HumanMessagePromptTemplate.from_template(
+        template="Section: {section}\nPrevious Queries: {searched_queries}\nReflection Feedback: {reflection_feedback}"
+    ),
+])
 
 
 def query_generator_node(state: ResearchState, config: RunnableConfig):
@@ -234,7 +292,8 @@ def query_generator_node(state: ResearchState, config: RunnableConfig):
 
     This node uses an LLM to generate targeted search queries for gathering information about
     the current section. It takes into account any previous queries that have been searched
-    and feedback from reflection to avoid redundancy and improve query relevance.
+    and feedback from reflection to avoid redundancy and improve query relevance. After a
+    reflection, queries are only generated for the sub-sections it found insufficiently covered.
 
     Args:
         state (ResearchState): The current research state containing section information,
@@ -246,67 +305,145 @@ def query_generator_node(state: ResearchState, config: RunnableConfig):
             - generated_queries (List[Query]): The newly generated search queries
             - searched_queries (List[Query]): Updated list of all searched queries
     """
-    configurable = Configuration.from_runnable_config(config)
-    llm = init_llm(
-        provider=configurable.provider,
-        model=configurable.model,
-        temperature=configurable.temperature
-    )
+    configurable = Configuration.from_runnable_config(config).for_node("query_generator")
+
+    result = invoke_llm(QUERY_GENERATOR_PROMPT, _query_generator_inputs(state, configurable), configurable, schema=Queries)
+
+    return {"generated_queries": result.queries, "searched_queries": result.queries}
 
-    query_generator_system_prompt = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(
-            QUERY_GENERATOR_SYSTEM_PROMPT_TEMPLATE.format(max_queries=configurable.max_queries)
-        ),
-        HumanMessagePromptTemplate.from_template(
-            template="Section: {section}\nPrevious Queries: {searched_queries}\nReflection Feedback: {reflection_feedback}"
-        ),
-    ])
-    query_generator_llm = query_generator_system_prompt | llm.with_structured_output(Queries)
 
-    state["reflection_feedback"] = state.get("reflection_feedback", Feedback(feedback=""))
-    state["searched_queries"] = state.get("searched_queries", [])
+async def aquery_generator_node(state: ResearchState, config: RunnableConfig):
+    """Async version of `query_generator_node`."""
+    configurable = Configuration.from_runnable_config(config).for_node("query_generator")
 
-    result = query_generator_llm.invoke(state)
+    result = await ainvoke_llm(QUERY_GENERATOR_PROMPT, _query_generator_inputs(state, configurable), configurable, schema=Queries)
 
     return {"generated_queries": result.queries, "searched_queries": result.queries}
 
 
+def _query_generator_inputs(state: ResearchState, configurable: Configuration) -> Dict:
+    section = state["section"]
+    feedback = state.get("reflection_feedback")
+    if feedback is None:
+        return {
+            **state,
+            "reflection_feedback": "",
+            "searched_queries": state.get("searched_queries", []),
+            "max_queries": configurable.max_queries
+        }
+
+    # Later rounds only research the sub-sections the reflection found insufficiently covered
+    uncovered = _uncovered_sub_sections(section, feedback, configurable.coverage_threshold)
+    missing = {coverage.sub_section_index: coverage.missing for coverage in feedback.coverage}
+    feedback_lines = [f"- {section.sub_sections[index]}: {missing.get(index) or 'Not covered.'}" for index in uncovered]
+    if feedback.feedback:
+        feedback_lines.append(feedback.feedback)
+
+    return {
+        **state,
+        "section": Section(section_name=section.section_name, sub_sections=[section.sub_sections[index] for index in uncovered]),
+        "reflection_feedback": "\n".join(feedback_lines),
+        "searched_queries": state.get("searched_queries", []),
+        "max_queries": configurable.max_queries
+    }
+
+
 def tavily_search_node(state: ResearchState, config: RunnableConfig):
     """
     Performs web searches using the Tavily search API for each generated query.
 
     This node takes the generated queries from the previous node and executes searches
-    using the Tavily search engine. For each query, it retrieves search results up to
-    the configured search depth, extracting the URL, title, and raw content from each result.
+    using the Tavily search engine. The queries are searched concurrently on a bounded
+    thread pool, each with its own timeout, so a slow or failed query does not hold up the
+    others. For each query, it retrieves search results up to the configured search depth,
+    extracting the URL, title, and raw content from each result. The raw content is cleaned
+    of boilerplate and capped to a token budget before it reaches the result accumulator.
+
+    In map-reduce accumulation mode, the results of each query (or each document) are also
+    summarized as soon as its search returns, while the other searches are still running;
+    the result accumulator then only has to combine the partial summaries.
 
     Args:
         state (ResearchState): The current research state containing generated queries
             and other research context
-        config (RunnableConfig): Configuration object containing search depth and other settings
+        config (RunnableConfig): Configuration object containing search depth, worker count and timeout settings
 
     Returns:
         dict: A dictionary containing:
             - search_results (List[SearchResults]): List of search results for each query,
               where each SearchResults object contains the original query and a list of
-              SearchResult objects with URL, title and raw content
+              SearchResult objects with URL, title and raw content, in the order of the generated queries
+            - partial_summary_ids (List[str]): In map-reduce mode, the blob ids of the partial
+              summaries of the new results, in query order
     """
     configurable = Configuration.from_runnable_config(config)
 
-    tavily_client = TavilyClient()
-    queries = state["generated_queries"]
-    search_results = []
+    if not configurable.map_reduce_accumulation:
+        return _search_results_update(search_queries(state["generated_queries"], configurable))
+
+    mapper = _ResultMapper(state, configurable)
+    map_futures: List[Tuple[int, int, Future]] = []
+    with ThreadPoolExecutor(max_workers=max(1, configurable.max_concurrent_map_calls), thread_name_prefix="result-map") as executor:
+        def on_result(index: int, search_result: SearchResults):
+            for position, blocks in enumerate(mapper.units(search_result)):
+                # Map calls run in a copy of the search's context, so they are counted in the metrics of this node
+                map_futures.append((index, position, executor.submit(contextvars.copy_context().run, mapper.map, blocks)))
 
-    for query in queries:
-        search_content = []
-        response = tavily_client.search(query=query.query, max_results=configurable.search_depth, include_raw_content=True)
-        for result in response["results"]:
-            if result['raw_content'] and result['url'] and result['title']:
-                search_content.append(SearchResult(url=result['url'], title=result['title'], raw_content=result['raw_content']))
-        search_results.append(SearchResults(query=query, results=search_content))
+        search_results = search_queries(state["generated_queries"], configurable, on_result=on_result)
+        partial_summary_ids = [future.result() for _, _, future in sorted(map_futures, key=lambda item: item[:2])]
+
+    return {
+        **_search_results_update(search_results),
+        "partial_summary_ids": [summary_id for summary_id in partial_summary_ids if summary_id is not None]
+    }
+
+
+async def atavily_search_node(state: ResearchState, config: RunnableConfig):
+    """Async version of `tavily_search_node`, running the searches as tasks on the event loop."""
+    configurable = Configuration.from_runnable_config(config)
+
+    if not configurable.map_reduce_accumulation:
+        return _search_results_update(await asearch_queries(state["generated_queries"], configurable))
+
+    mapper = _ResultMapper(state, configurable)
+    semaphore = asyncio.Semaphore(max(1, configurable.max_concurrent_map_calls))
+    map_tasks: List[Tuple[int, asyncio.Task]] = []
+
+    async def map_blocks(blocks: List[str]) -> Optional[str]:
+        async with semaphore:
+            return await mapper.amap(blocks)
+
+    async def map_result(search_result: SearchResults) -> List[Optional[str]]:
+        # The blocks are read from the document store, so they are built off the event loop
+        units = await asyncio.to_thread(mapper.units, search_result)
+        return await asyncio.gather(*(map_blocks(blocks) for blocks in units))
+
+    def on_result(index: int, search_result: SearchResults):
+        map_tasks.append((index, asyncio.ensure_future(map_result(search_result))))
+
+    search_results = await asearch_queries(state["generated_queries"], configurable, on_result=on_result)
+    partial_summary_ids = await asyncio.gather(*(task for _, task in sorted(map_tasks, key=lambda item: item[0])))
+
+    return {
+        **_search_results_update(search_results),
+        "partial_summary_ids": [summary_id for summary_ids in partial_summary_ids for summary_id in summary_ids if summary_id is not None]
+    }
+
+
+def _search_results_update(search_results: List[SearchResults]) -> Dict:
+    removed_tokens = sum(search_result.removed_tokens for search_result in search_results)
+    if removed_tokens:
+        print(f"Preprocessing removed ~{removed_tokens} tokens of boilerplate and overflow from the search results.")
 
     return {"search_results": search_results}
 
 
+RESULT_ACCUMULATOR_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(RESULT_ACCUMULATOR_SYSTEM_PROMPT_TEMPLATE),
+    HumanMessagePromptTemplate.from_template(template="{search_results}"),
+])
+
+
 def result_accumulator_node(state: ResearchState, config: RunnableConfig):
     """
     Accumulates and synthesizes search results into coherent content.
@@ -314,6 +451,17 @@ def result_accumulator_node(state: ResearchState, config: RunnableConfig):
     This node takes the search results from the previous node and uses an LLM to process
     and combine them into a unified, coherent piece of content. The LLM analyzes the 
     search results and extracts relevant information to build knowledge about the section topic.
+    The raw content of the search results is resolved from the run's document store, and a
+    page returned by several queries is included only once.
+
+    In incremental mode, a reflection round only synthesizes the documents not synthesized by
+    an earlier pass and appends the synthesis to the existing accumulated content, so the
+    cost of a round depends on the new data only. Documents dropped to fit the prompt budget
+    are not marked as synthesized, so the next round picks them up.
+
+    In map-reduce mode, the search node has already summarized the results of each query (or
+    document), and this node is the reduce step: it combines the partial summaries into the
+    accumulated content, with one LLM call whose input is a fraction of the raw results.
 
     Args:
         state (ResearchState): The current research state containing search results
@@ -322,38 +470,222 @@ def result_accumulator_node(state: ResearchState, config: RunnableConfig):
 
     Returns:
         dict: A dictionary containing:
-            - accumulated_content (str): The synthesized content generated from processing
-              the search results
+            - accumulated_content_id (str): The blob id of the synthesized content generated
+              from processing the search results
+            - accumulated_document_ids (list): The ids of the documents synthesized so far
+            - accumulated_summary_count (int): The number of partial summaries combined so far
     """
-    configurable = Configuration.from_runnable_config(config)
-    llm = init_llm(
-        provider=configurable.provider,
-        model=configurable.model,
-        temperature=configurable.temperature
+    configurable = Configuration.from_runnable_config(config).for_node("result_accumulator")
+
+    if configurable.map_reduce_accumulation:
+        partial_summaries, previous_content = _pending_partial_summaries(state, configurable)
+        if previous_content is not None and not partial_summaries:
+            return _accumulated_counts(state)
+        if len(partial_summaries) > 1:
+            result = invoke_llm(RESULT_REDUCER_PROMPT, _result_reducer_inputs(state, configurable, partial_summaries), configurable)
+            return _accumulated_content_update(state, configurable, previous_content, result.content)
+        return _accumulated_content_update(state, configurable, previous_content, "".join(partial_summaries))
+
+    search_result_blocks, document_ids, previous_content = _pending_search_results(state, configurable)
+    if previous_content is not None and not search_result_blocks:
+        return _accumulated_counts(state)
+
+    inputs, rendered_blocks = _result_accumulator_inputs(state, configurable, search_result_blocks)
+    result = invoke_llm(RESULT_ACCUMULATOR_PROMPT, inputs, configurable)
+    return _accumulated_content_update(state, configurable, previous_content, result.content, document_ids[:rendered_blocks])
+
+
+async def aresult_accumulator_node(state: ResearchState, config: RunnableConfig):
+    """Async version of `result_accumulator_node`."""
+    configurable = Configuration.from_runnable_config(config).for_node("result_accumulator")
+
+    if configurable.map_reduce_accumulation:
+        partial_summaries, previous_content = await asyncio.to_thread(_pending_partial_summaries, state, configurable)
+        if previous_content is not None and not partial_summaries:
+            return _accumulated_counts(state)
+        if len(partial_summaries) > 1:
+            result = await ainvoke_llm(RESULT_REDUCER_PROMPT, _result_reducer_inputs(state, configurable, partial_summaries), configurable)
+            return await asyncio.to_thread(_accumulated_content_update, state, configurable, previous_content, result.content)
+        return await asyncio.to_thread(_accumulated_content_update, state, configurable, previous_content, "".join(partial_summaries))
+
+    search_result_blocks, document_ids, previous_content = await asyncio.to_thread(_pending_search_results, state, configurable)
+    if previous_content is not None and not search_result_blocks:
+        return _accumulated_counts(state)
+
+    inputs, rendered_blocks = _result_accumulator_inputs(state, configurable, search_result_blocks)
+    result = await ainvoke_llm(RESULT_ACCUMULATOR_PROMPT, inputs, configurable)
+    return await asyncio.to_thread(
+        _accumulated_content_update, state, configurable, previous_content, result.content, document_ids[:rendered_blocks]
     )
 
-    result_accumulator_system_prompt = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(RESULT_ACCUMULATOR_SYSTEM_PROMPT_TEMPLATE),
-        HumanMessagePromptTemplate.from_template(template="{search_results}"),
-    ])
-    result_accumulator_llm = result_accumulator_system_prompt | llm
 
-    result = result_accumulator_llm.invoke(state)
+def _pending_search_results(state: ResearchState, configurable: Configuration) -> Tuple[List[str], List[str], Optional[str]]:
+    """
+    Return the search result blocks still to synthesize, the ids of their documents and the
+    accumulated content they extend.
+
+    The accumulated content is None unless the synthesis is appended to an earlier one in
+    incremental mode.
+    """
+    document_store = get_document_store(configurable)
+    search_results = state["search_results"]
+
+    if configurable.incremental_accumulation and state.get("accumulated_content_id"):
+        accumulated_document_ids = state.get("accumulated_document_ids", [])
+        search_result_blocks = format_search_result_blocks(search_results, document_store, exclude_document_ids=accumulated_document_ids)
+        document_ids = unique_document_ids(search_results, exclude_document_ids=accumulated_document_ids)
+        return search_result_blocks, document_ids, get_blob_store(configurable.blob_store_path).get(state["accumulated_content_id"])
+
+    return format_search_result_blocks(search_results, document_store), unique_document_ids(search_results), None
+
+
+def _result_accumulator_inputs(state: ResearchState, configurable: Configuration, search_result_blocks: List[str]) -> Tuple[Dict, int]:
+    """Return the prompt inputs of the accumulator and the number of search result blocks they kept."""
+    # Documents are ranked within each query, so the last blocks are the first to go
+    search_results = PromptInput("search_results", search_result_blocks, priority=0, strategy="drop", separator=SEARCH_RESULT_SEPARATOR)
+    inputs = fit_prompt_inputs(RESULT_ACCUMULATOR_PROMPT, state, configurable, [search_results])
+    return inputs, len(search_results.pieces)
+
+
+def _accumulated_content_update(
+        state: ResearchState,
+        configurable: Configuration,
+        previous_content: Optional[str],
+        content: str,
+        document_ids: Iterable[str] = ()
+) -> Dict:
+    if previous_content is None:
+        accumulated_content, accumulated_document_ids = content, list(document_ids)
+    else:
+        accumulated_content = f"{previous_content}\n\n{content}"
+        accumulated_document_ids = state.get("accumulated_document_ids", []) + list(document_ids)
+    return {
+        "accumulated_content_id": get_blob_store(configurable.blob_store_path).put(accumulated_content),
+        "accumulated_document_ids": accumulated_document_ids,
+        **_accumulated_counts(state)
+    }
+
+
+def _accumulated_counts(state: ResearchState) -> Dict:
+    return {
+        "accumulated_summary_count": len(state.get("partial_summary_ids", []))
+    }
+
+
+class _ResultMapper:
+    """
+    The map step of map-reduce accumulation: summarizes the results of one query, or of one
+    document, with the result accumulator prompt and model.
+
+    A document is summarized once per section: documents returned by an earlier round are
+    already covered by its partial summaries, and a document returned by several queries of
+    the round is only summarized with the first query to complete. Every map prompt is fitted
+    to `map_token_budget`. Like a failed search, a map call that still fails after its retries
+    is skipped instead of failing the other ones.
+    """
+
+    def __init__(self, state: ResearchState, configurable: Configuration):
+        if configurable.map_granularity not in ("query", "document"):
+            raise ValueError(f"Unknown map_granularity '{configurable.map_granularity}', expected 'query' or 'document'.")
+        self.state = state
+        self.granularity = configurable.map_granularity
+        self.document_store = get_document_store(configurable)
+        self.blob_store = get_blob_store(configurable.blob_store_path)
+        self.configurable = configurable.for_node("result_accumulator")
+        budgets = [budget for budget in (self.configurable.prompt_token_budget, configurable.map_token_budget) if budget > 0]
+        if budgets:
+            self.configurable = replace(self.configurable, prompt_token_budget=min(budgets))
+        self._lock = threading.Lock()
+        self._seen_document_ids = {
+            result.document_id for search_result in state.get("search_results", []) for result in search_result.results
+        }
+
+    def units(self, search_result: SearchResults) -> List[List[str]]:
+        """Return the search result blocks of each map call for the results of one query."""
+        with self._lock:
+            results = [result for result in search_result.results if result.document_id not in self._seen_document_ids]
+            self._seen_document_ids.update(result.document_id for result in results)
+        blocks = format_search_result_blocks([SearchResults(query=search_result.query, results=results)], self.document_store)
+        if not blocks:
+            return []
+        return [[block] for block in blocks] if self.granularity == "document" else [blocks]
+
+    def _inputs(self, blocks: List[str]) -> Dict:
+        return fit_prompt_inputs(
+            RESULT_ACCUMULATOR_PROMPT,
+            self.state,
+            self.configurable,
+            [PromptInput("search_results", blocks, priority=0, separator=SEARCH_RESULT_SEPARATOR)]
+        )
+
+    def map(self, blocks: List[str]) -> Optional[str]:
+        """Summarize search result blocks and return the blob id of the partial summary, or None if the call failed."""
+        try:
+            result = invoke_llm(RESULT_ACCUMULATOR_PROMPT, self._inputs(blocks), self.configurable)
+        except Exception as e:
+            print(f"Summarizing {len(blocks)} search results failed, skipping them: {e}")
+            return None
+        return self.blob_store.put(result.content)
+
+    async def amap(self, blocks: List[str]) -> Optional[str]:
+        """Async version of `map`."""
+        try:
+            result = await ainvoke_llm(RESULT_ACCUMULATOR_PROMPT, self._inputs(blocks), self.configurable)
+        except Exception as e:
+            print(f"Summarizing {len(blocks)} search results failed, skipping them: {e}")
+            return None
+        return await self.blob_store.aput(result.content)
+
 
-    return {"accumulated_content": result.content}
+RESULT_REDUCER_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(RESULT_REDUCER_SYSTEM_PROMPT_TEMPLATE),
+    HumanMessagePromptTemplate.from_template(template="{partial_summaries}"),
+])
+
+
+def _pending_partial_summaries(state: ResearchState, configurable: Configuration) -> Tuple[List[str], Optional[str]]:
+    """
+    Return the partial summaries still to combine and the accumulated content they extend.
+
+    The accumulated content is None unless the combination is appended to an earlier one in
+    incremental mode.
+    """
+    blob_store = get_blob_store(configurable.blob_store_path)
+    partial_summary_ids = state.get("partial_summary_ids", [])
+
+    if configurable.incremental_accumulation and state.get("accumulated_content_id"):
+        pending_ids = partial_summary_ids[state.get("accumulated_summary_count", 0):]
+        return [blob_store.get(summary_id) for summary_id in pending_ids], blob_store.get(state["accumulated_content_id"])
+
+    return [blob_store.get(summary_id) for summary_id in partial_summary_ids], None
+
+
+def _result_reducer_inputs(state: ResearchState, configurable: Configuration, partial_summaries: List[str]) -> Dict:
+    return fit_prompt_inputs(
+        RESULT_REDUCER_PROMPT,
+        state,
+        configurable,
+        [PromptInput("partial_summaries", partial_summaries, priority=0, separator=SEARCH_RESULT_SEPARATOR)]
+    )
+
+
+REFLECTION_FEEDBACK_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(REFLECTION_FEEDBACK_SYSTEM_PROMPT_TEMPLATE),
+    HumanMessagePromptTemplate.from_template(template="Section: {section_name}\nSub-sections:\n{sub_sections}\nAccumulated Content: {accumulated_content}"),
+])
 
 
 def reflection_feedback_node(
         state: ResearchState, 
         config: RunnableConfig
-) -> Command[Literal["final_section_formatter", "query_generator"]]:
+) -> Command[Literal["__end__", "query_generator"]]:
     """
     Evaluates the quality and completeness of accumulated research content and determines next steps.
 
-    This node uses an LLM to analyze the current section's accumulated content and provide feedback
-    on whether it adequately covers the section requirements. Based on the feedback and number of
-    reflection iterations, it decides whether to proceed to final formatting or generate more queries
-    for additional research.
+    This node uses an LLM to score how well the current section's accumulated content covers each
+    of its sub-sections. Sub-sections scored below the coverage threshold are researched again by
+    the next round, until every sub-section is covered or the configured number of reflections
+    has run.
 
     Args:
         state (ResearchState): The current research state containing the section info and
@@ -362,32 +694,64 @@ def reflection_feedback_node(
 
     Returns:
         Command: A Command object directing the flow to either:
-            - final_section_formatter: If content is sufficient or max reflections reached
-            - query_generator: If content needs improvement and more iterations remain
+            - END: If every sub-section is covered or max reflections reached, ending the search
+              loop so the section can be written once its internal knowledge is ready
+            - query_generator: If some sub-sections are not covered and more iterations remain
             The Command includes updated reflection feedback and count in its state updates.
     """
     
-    configurable = Configuration.from_runnable_config(config)
-    llm = init_llm(
-        provider=configurable.provider,
-        model=configurable.model,
-        temperature=configurable.temperature
+    configurable = Configuration.from_runnable_config(config).for_node("reflection")
+
+    result = invoke_llm(REFLECTION_FEEDBACK_PROMPT, _reflection_inputs(state, configurable), configurable, schema=Feedback)
+    return _reflection_command(state, configurable, result)
+
+
+async def areflection_feedback_node(
+        state: ResearchState, 
+        config: RunnableConfig
+) -> Command[Literal["__end__", "query_generator"]]:
+    """Async version of `reflection_feedback_node`."""
+    configurable = Configuration.from_runnable_config(config).for_node("reflection")
+
+    inputs = await asyncio.to_thread(_reflection_inputs, state, configurable)
+    result = await ainvoke_llm(REFLECTION_FEEDBACK_PROMPT, inputs, configurable, schema=Feedback)
+    return _reflection_command(state, configurable, result)
+
+
+def _reflection_inputs(state: ResearchState, configurable: Configuration) -> Dict:
+    accumulated_content = get_blob_store(configurable.blob_store_path).get(state["accumulated_content_id"])
+    sub_sections = state["section"].sub_sections
+    return fit_prompt_inputs(
+        REFLECTION_FEEDBACK_PROMPT,
+        {
+            **state,
+            "section_name": state["section"].section_name,
+            "sub_sections": "\n".join(f"{index}. {sub_section}" for index, sub_section in enumerate(sub_sections))
+        },
+        configurable,
+        [PromptInput("accumulated_content", [accumulated_content], priority=0)]
     )
 
-    reflection_feedback_system_prompt = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(REFLECTION_FEEDBACK_SYSTEM_PROMPT_TEMPLATE),
-        HumanMessagePromptTemplate.from_template(template="Section: {section}\nAccumulated Content: {accumulated_content}"),
-    ])
-    reflection_feedback_llm = reflection_feedback_system_prompt | llm.with_structured_output(Feedback)
 
+def _uncovered_sub_sections(section: Section, feedback: Feedback, threshold: float) -> List[int]:
+    """Return the indexes of the sub-sections scored below the threshold; sub-sections left unscored count as uncovered."""
+    scores = {coverage.sub_section_index: coverage.score for coverage in feedback.coverage}
+    return [index for index in range(len(section.sub_sections)) if scores.get(index, 0.0) < threshold]
+
+
+def _reflection_command(state: ResearchState, configurable: Configuration, feedback: Feedback) -> Command:
     reflection_count = state["reflection_count"] if "reflection_count" in state else 1
-    result = reflection_feedback_llm.invoke(state)
-    feedback = result.feedback
+    section = state["section"]
+    uncovered = _uncovered_sub_sections(section, feedback, configurable.coverage_threshold)
+    print(
+        f"Reflection {reflection_count}/{configurable.num_reflections} on {section.section_name}: "
+        f"{len(section.sub_sections) - len(uncovered)}/{len(section.sub_sections)} sub-sections covered."
+    )
 
-    if (feedback == True) or (feedback.lower() == "true") or (reflection_count < configurable.num_reflections):
+    if not uncovered or reflection_count >= configurable.num_reflections:
         return Command(
             update={"reflection_feedback": feedback, "reflection_count": reflection_count},
-            goto="final_section_formatter"
+            goto=END
         )
     else:
         return Command(
@@ -396,6 +760,12 @@ def reflection_feedback_node(
         )
 
 
+FINAL_SECTION_FORMATTER_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(FINAL_SECTION_FORMATTER_SYSTEM_PROMPT_TEMPLATE),
+    HumanMessagePromptTemplate.from_template(template="Internal Knowledge: {knowledge}\nSearch Result content: {accumulated_content}"),
+])
+
+
 def final_section_formatter_node(state: ResearchState, config: RunnableConfig):
     """
     Formats the final content for a section of the research report.
@@ -403,6 +773,10 @@ def final_section_formatter_node(state: ResearchState, config: RunnableConfig):
     This node uses an LLM to take the accumulated research content and internal knowledge
     about the section, and format it into a cohesive, well-structured section of the report.
     The formatted content is both saved to a log file and returned as part of the state.
+    In token-streaming mode, the content is written to the log file as the model produces it,
+    and to stdout as well when sections run one at a time. When several sections run
+    concurrently, each section is printed whole once it is done, so their tokens are not
+    interleaved on stdout.
 
     Args:
         state (ResearchState): The current research state containing the section info,
@@ -410,30 +784,84 @@ def final_section_formatter_node(state: ResearchState, config: RunnableConfig):
         config (RunnableConfig): Configuration object containing LLM settings
 
     Returns:
-        dict: A dictionary containing the formatted section content in the 'final_section_content' key
+        dict: A dictionary containing the blob id of the formatted section content, tagged with its
+            section index, in the 'final_section_content' key
     """
 
-    configurable = Configuration.from_runnable_config(config)
-    llm = init_llm(
-        provider=configurable.provider,
-        model=configurable.model,
-        temperature=configurable.temperature
-    )
+    configurable = Configuration.from_runnable_config(config).for_node("final_section_formatter")
+    blob_store = get_blob_store(configurable.blob_store_path)
+
+    with _open_section_log(state) as f:
+        stream_token = _section_token_writer(f, configurable) if configurable.stream_tokens else None
+        result = invoke_llm(FINAL_SECTION_FORMATTER_PROMPT, _final_section_inputs(state, configurable, blob_store), configurable, on_token=stream_token)
+        _finish_section_log(f, state, configurable, result.content)
+
+    section_content = SectionContent(section_index=state["current_section_index"], content_id=blob_store.put(result.content))
+    return {"final_section_content": [section_content]}
+
 
-    final_section_formatter_system_prompt = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(FINAL_SECTION_FORMATTER_SYSTEM_PROMPT_TEMPLATE),
-        HumanMessagePromptTemplate.from_template(template="Internal Knowledge: {knowledge}\nSearch Result content: {accumulated_content}"),
-    ])
-    final_section_formatter_llm = final_section_formatter_system_prompt | llm
+async def afinal_section_formatter_node(state: ResearchState, config: RunnableConfig):
+    """Async version of `final_section_formatter_node`."""
+    configurable = Configuration.from_runnable_config(config).for_node("final_section_formatter")
+    blob_store = get_blob_store(configurable.blob_store_path)
 
-    result = final_section_formatter_llm.invoke(state)
+    # The log file is opened and closed on a worker thread; the streamed tokens are small
+    # writes, so they are flushed to it as they arrive like in the sync version
+    inputs = await asyncio.to_thread(_final_section_inputs, state, configurable, blob_store)
+    f = await asyncio.to_thread(_open_section_log, state)
+    try:
+        stream_token = _section_token_writer(f, configurable) if configurable.stream_tokens else None
+        result = await ainvoke_llm(FINAL_SECTION_FORMATTER_PROMPT, inputs, configurable, on_token=stream_token)
+        _finish_section_log(f, state, configurable, result.content)
+    finally:
+        await asyncio.to_thread(f.close)
 
+    section_content = SectionContent(section_index=state["current_section_index"], content_id=await blob_store.aput(result.content))
+    return {"final_section_content": [section_content]}
+
+
+def _open_section_log(state: ResearchState):
     os.makedirs("logs/section_content", exist_ok=True)
+    return open(f"logs/section_content/{state['current_section_index']+1}. {state['section'].section_name}.md", "a", encoding="utf-8")
+
+
+def _section_token_writer(f, configurable: Configuration):
+    print_tokens = configurable.max_parallel_sections <= 1
+
+    def stream_token(token: str):
+        f.write(token)
+        f.flush()
+        if print_tokens:
+            print(token, end="", flush=True)
+    return stream_token
+
+
+def _final_section_inputs(state: ResearchState, configurable: Configuration, blob_store) -> Dict:
+    # The searched content is grounded in sources, so the internal knowledge is trimmed first
+    return fit_prompt_inputs(
+        FINAL_SECTION_FORMATTER_PROMPT,
+        state,
+        configurable,
+        [
+            PromptInput("knowledge", [blob_store.get(state["knowledge_id"])], priority=0),
+            PromptInput("accumulated_content", [blob_store.get(state["accumulated_content_id"])], priority=1)
+        ]
+    )
 
-    with open(f"logs/section_content/{state['current_section_index']+1}. {state['section'].section_name}.md", "a", encoding="utf-8") as f:
-        f.write(f"{result.content}")
 
-    return {"final_section_content": [result.content]}
+def _finish_section_log(f, state: ResearchState, configurable: Configuration, content: str):
+    if not configurable.stream_tokens:
+        f.write(f"{content}")
+    elif configurable.max_parallel_sections > 1:
+        print(f"<<< SECTION {state['current_section_index']+1}: {state['section'].section_name} >>>\n{content}")
+    else:
+        print()
+
+
+FINALIZER_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(FINALIZER_SYSTEM_PROMPT_TEMPLATE),
+    HumanMessagePromptTemplate.from_template(template="Section Contents: {final_section_content}\n\nSearches: {extracted_search_results}"),
+])
 
 
 def finalizer_node(state: AgentState, config: RunnableConfig):
@@ -444,6 +872,8 @@ def finalizer_node(state: AgentState, config: RunnableConfig):
     1. Uses an LLM to generate a conclusion and curated list of references
     2. Combines all section content into a single markdown document
     3. Saves the final report to a file
+
+    In token-streaming mode, the conclusion is written to stdout as the model produces it.
     
     Args:
         state (AgentState): The current agent state containing all section content and search results
@@ -453,31 +883,85 @@ def finalizer_node(state: AgentState, config: RunnableConfig):
         dict: A dictionary containing the complete report content in the 'final_report_content' key
     """
 
-    configurable = Configuration.from_runnable_config(config)
-    llm = init_llm(
-        provider=configurable.provider,
-        model=configurable.model,
-        temperature=configurable.temperature
+    configurable = Configuration.from_runnable_config(config).for_node("finalizer")
+
+    section_contents, inputs = _finalizer_inputs(state, configurable)
+    result = invoke_llm(
+        FINALIZER_PROMPT,
+        inputs,
+        configurable,
+        schema=ConclusionAndReferences,
+        on_token=(lambda token: print(token, end="", flush=True)) if configurable.stream_tokens else None,
+        stream_field="conclusion"
+    )
+    return _write_final_report(state, configurable, section_contents, result)
+
+
+async def afinalizer_node(state: AgentState, config: RunnableConfig):
+    """Async version of `finalizer_node`."""
+    configurable = Configuration.from_runnable_config(config).for_node("finalizer")
+
+    section_contents, inputs = await asyncio.to_thread(_finalizer_inputs, state, configurable)
+    result = await ainvoke_llm(
+        FINALIZER_PROMPT,
+        inputs,
+        configurable,
+        schema=ConclusionAndReferences,
+        on_token=(lambda token: print(token, end="", flush=True)) if configurable.stream_tokens else None,
+        stream_field="conclusion"
     )
+    return await asyncio.to_thread(_write_final_report, state, configurable, section_contents, result)
+
+
+def _finalizer_inputs(state: AgentState, configurable: Configuration) -> Tuple[List[str], Dict]:
+    """
+    Return the section contents in outline order and the prompt inputs of the finalizer.
 
+    The prompt lists every section and every unique search result of the report, fitted to the
+    token budget by dropping search results first and shortening the sections only if needed.
+    """
     extracted_search_results = []
+    seen_urls = set()
     for search_results in state['search_results']:
         for search_result in search_results.results:
-            extracted_search_results.append({"url": search_result.url, "title": search_result.title})
+            if search_result.url not in seen_urls:
+                seen_urls.add(search_result.url)
+                extracted_search_results.append(f"- {search_result.title}: {search_result.url}")
+
+    # Section contents are kept in outline order by the reducer on AgentState
+    blob_store = get_blob_store(configurable.blob_store_path)
+    section_contents = [blob_store.get(section_content.content_id) for section_content in state["final_section_content"]]
+
+    inputs = fit_prompt_inputs(
+        FINALIZER_PROMPT,
+        state,
+        configurable,
+        [
+            PromptInput("extracted_search_results", extracted_search_results, priority=0, strategy="drop", separator="\n"),
+            PromptInput("final_section_content", list(section_contents), priority=1)
+        ]
+    )
+
+    if configurable.stream_tokens:
+        print("\n<<< CONCLUSION >>>")
+
+    return section_contents, inputs
 
-    finalizer_system_prompt = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(FINALIZER_SYSTEM_PROMPT_TEMPLATE),
-        HumanMessagePromptTemplate.from_template(template="Section Contents: {final_section_content}\n\nSearches: {extracted_search_results}"),
-    ])
-    finalizer_llm = finalizer_system_prompt | llm.with_structured_output(ConclusionAndReferences)
 
-    result = finalizer_llm.invoke({**state, "extracted_search_results": extracted_search_results})
+def _write_final_report(
+        state: AgentState,
+        configurable: Configuration,
+        section_contents: List[str],
+        result: ConclusionAndReferences
+) -> Dict:
+    if configurable.stream_tokens:
+        print()
 
-    final_report = "\n\n".join([section_content for section_content in state["final_section_content"]])
+    final_report = "\n\n".join(section_contents)
     final_report += "\n\n" + result.conclusion
     final_report += "\n\n# References\n\n" + "\n".join(["- "+reference for reference in result.references])
     
     with open(f"reports/{state['topic']}.md", "w", encoding="utf-8") as f:
         f.write(final_report)
 
-    return {"final_report_content": final_report}
\ No newline at end of file
+    return {"final_report_content": final_report}
@@ -0,0 +1,124 @@
+from collections import Counter
+from typing import AbstractSet, Iterable, List, Set, Tuple
+from .utils import count_tokens, CHARS_PER_TOKEN
+import re
+
+
+# Short lines mentioning these are site chrome (cookie banners, navigation, footers) when they are also
+# shaped like navigation or repeated across the documents of a response; in prose they are kept
+BOILERPLATE_PATTERN = re.compile(
+    r"cookie|privacy (policy|settings)|terms (of|and) (use|service|conditions)|all rights reserved|copyright|©"
+    r"|sign (in|up)|log ?in|register|subscribe|newsletter|skip to (main )?content|back to top|share (on|this)"
+    r"|follow us|accept all|javascript|advertisement|related (posts|articles)|read more",
+    re.IGNORECASE
+)
+BOILERPLATE_MAX_LINE_LENGTH = 100
+
+# Lines that only hold links or images, e.g. "[Home](/) | [Blog](/blog)" or "![logo](logo.png)"
+LINK_ONLY_PATTERN = re.compile(r"^(\s*[|•·>»\-*]?\s*!?\[[^\]]*\]\([^)]*\)\s*)+$")
+# Lines holding a markdown link, e.g. "[Log in](/login) to comment"
+LINK_PATTERN = re.compile(r"\[[^\]]*\]\([^)]*\)")
+# Navigation bars made of short items separated by pipes or bullets
+NAVIGATION_PATTERN = re.compile(r"^([^|•·]{1,25}[|•·]){2,}[^|•·]{0,25}$")
+# Lines without any letter or digit, e.g. "* * *" or "---"
+NO_WORDS_PATTERN = re.compile(r"^[^A-Za-z0-9]*$")
+
+
+def _normalized_lines(content: str) -> List[str]:
+    """Split content into lines with runs of whitespace (including non-breaking spaces) collapsed to one space."""
+    return [" ".join(line.split()) for line in content.splitlines()]
+
+
+def _cell_count(line: str) -> int:
+    return len(line.strip("|").split("|")) if "|" in line else 0
+
+
+def _is_table_row(line: str, previous_line: str, next_line: str) -> bool:
+    """A pipe-separated line is a table row when it holds figures or a neighbouring line has as many cells."""
+    cells = _cell_count(line)
+    if cells < 2:
+        return False
+    return line.startswith("|") or re.search(r"\d", line) is not None or cells in (_cell_count(previous_line), _cell_count(next_line))
+
+
+def _is_boilerplate(line: str, previous_line: str, next_line: str, shared_lines: AbstractSet[str]) -> bool:
+    if _is_table_row(line, previous_line, next_line):
+        return False
+    if LINK_ONLY_PATTERN.match(line) or NAVIGATION_PATTERN.match(line) or NO_WORDS_PATTERN.match(line):
+        return True
+    if len(line) > BOILERPLATE_MAX_LINE_LENGTH or BOILERPLATE_PATTERN.search(line) is None:
+        return False
+    return LINK_PATTERN.search(line) is not None or line.lower() in shared_lines
+
+
+def find_shared_lines(contents: Iterable[str]) -> Set[str]:
+    """Return the normalized lines, in lower case, that appear in more than one of the contents."""
+    counts = Counter(
+        line
+        for content in contents
+        for line in set(_normalized_lines(content.lower())) if line
+    )
+    return {line for line, count in counts.items() if count > 1}
+
+
+def clean_content(content: str, shared_lines: AbstractSet[str] = frozenset()) -> str:
+    """
+    Strip boilerplate from the raw content of a web page.
+
+    Drops navigation bars, link-only lines and separator lines, and the short lines mentioning
+    cookies, logins, subscriptions and similar chrome when they hold a link or are among
+    `shared_lines` (the lines repeated across the documents of the same response). Prose,
+    numbers and table rows are always kept. Also collapses runs of whitespace, removes lines
+    repeated verbatim elsewhere on the page and squeezes consecutive blank lines into one.
+    """
+    lines = _normalized_lines(content)
+    cleaned_lines = []
+    seen_lines = set()
+    for index, line in enumerate(lines):
+        if not line:
+            if cleaned_lines and cleaned_lines[-1]:
+                cleaned_lines.append("")
+            continue
+        normalized_line = line.lower()
+        previous_line = lines[index - 1] if index > 0 else ""
+        next_line = lines[index + 1] if index + 1 < len(lines) else ""
+        if normalized_line in seen_lines or _is_boilerplate(line, previous_line, next_line, shared_lines):
+            continue
+        seen_lines.add(normalized_line)
+        cleaned_lines.append(line)
+    return "\n".join(cleaned_lines).strip()
+
+
+def truncate_to_tokens(content: str, max_tokens: int) -> str:
+    """Truncate content to about `max_tokens` tokens, cutting at a line or word boundary when possible."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if max_tokens <= 0 or len(content) <= max_chars:
+        return content
+    truncated = content[:max_chars]
+    boundary = max(truncated.rfind("\n"), truncated.rfind(" "))
+    if boundary > max_chars * 0.8:
+        truncated = truncated[:boundary]
+    return truncated.rstrip() + " ..."
+
+
+def preprocess_content(
+        content: str,
+        max_tokens: int,
+        clean: bool = True,
+        shared_lines: AbstractSet[str] = frozenset()
+) -> Tuple[str, int]:
+    """
+    Prepare the raw content of a search result for the LLM.
+
+    Args:
+        content: The raw content of the web page.
+        max_tokens: The token budget of the document, 0 keeps the whole document.
+        clean: Whether to strip boilerplate before truncating.
+        shared_lines: The lines repeated across the documents of the same search response, see `find_shared_lines`.
+
+    Returns:
+        The processed content and the estimated number of tokens that were removed.
+    """
+    processed_content = clean_content(content, shared_lines) if clean else content
+    processed_content = truncate_to_tokens(processed_content, max_tokens)
+    return processed_content, max(count_tokens(content) - count_tokens(processed_content), 0)
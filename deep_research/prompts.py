@@ -168,7 +168,7 @@ Generate up to {max_queries} effective search queries that will retrieve the mos
 6. Include technical terminology and domain-specific language when appropriate
 
 ### For Subsequent Runs (with reflection_feedback):
-1. Carefully analyze the reflection feedback to understand information gaps
+1. Carefully analyze the reflection feedback to understand information gaps; the section then only lists the sub-sections that are still insufficiently covered, so focus every query on them
 2. Prioritize queries that address the specific missing information
 3. Avoid generating queries too similar to previous_queries
 4. Create more specialized or alternative phrasings to find the missing information
@@ -202,14 +202,15 @@ Remember: The most important queries should come first in your list, as the syst
 RESULT_ACCUMULATOR_SYSTEM_PROMPT_TEMPLATE = """You are a specialized agent responsible for curating and synthesizing raw search results. Your task is to transform unstructured web content into coherent, relevant, and organized information that can be used for report generation.
 
 ## Input
-You will receive a list of SearchResult objects, each containing:
-1. A Query object with the search query that was used
-2. A list of raw_content strings containing text extracted from web pages
+You will receive a list of search results separated by "---", each containing:
+1. The search query that was used
+2. The title and URL of the web page
+3. The content extracted from the web page
 
 ## Process
-For each SearchResult provided:
+For each search result provided:
 
-1. ANALYZE the raw_content to identify:
+1. ANALYZE the content to identify:
    - Key information relevant to the associated query
    - Main concepts, definitions, and relationships
    - Supporting evidence, statistics, or examples
@@ -249,13 +250,43 @@ For each SearchResult provided:
 """
 
 
+RESULT_REDUCER_SYSTEM_PROMPT_TEMPLATE = """You are a specialized agent responsible for combining partial syntheses of search results into one coherent body of research content. Each partial synthesis was curated from the results of a single search query or a single web page, and your output will be used for report generation.
+
+## Input
+You will receive a list of partial syntheses separated by "---". Each one is already cleaned of website boilerplate and organized, but they overlap and are unaware of each other.
+
+## Process
+1. MERGE the partial syntheses by:
+   - Consolidating information that appears in several of them into a single statement
+   - Grouping related concepts, findings and evidence together regardless of which partial synthesis they come from
+   - Keeping every distinct fact, figure, example, formula and source attribution
+
+2. RECONCILE the content by:
+   - Resolving contradictions where possible (noting them explicitly otherwise)
+   - Preferring more recent information when partial syntheses disagree on time-sensitive facts
+
+3. ORGANIZE the result into:
+   - Core concepts and definitions
+   - Key findings and insights
+   - Supporting evidence and examples
+   - Contrasting viewpoints (if present)
+   - Contextual background information
+
+## Guidelines
+- Do not add information that is not present in the partial syntheses
+- Maintain proper attribution when specific sources are referenced
+- Remove repetition, not detail: NO IMPORTANT DETAILS SHOULD BE LEFT OUT. YOU MUST BE DETAILED, THOROUGH AND COMPREHENSIVE.
+- DO NOT TRY TO OVERSIMPLIFY ANY TOPIC. COMPREHENSIVENESS IS KEY. IT IS GOING TO BE USED IN A RESEARCH REPORT.
+"""
+
+
 REFLECTION_FEEDBACK_SYSTEM_PROMPT_TEMPLATE = """You are a specialized agent responsible for critically evaluating search result content against report section requirements. You determine whether the accumulated content sufficiently addresses the intended section scope or requires additional information.
 
 ## Input
 You will receive:
 1. A Section object containing:
    - section_name: The name of the section without its number
-   - sub_sections: A list of comprehensive descriptions of sub-sections
+   - sub_sections: A numbered list of comprehensive descriptions of sub-sections
 2. Accumulated content from search results related to this section
 
 ## Process
@@ -282,34 +313,41 @@ Carefully analyze the relationship between the section requirements and the accu
    - Technical details required but not present
 
 ## Output
-Produce a Feedback object with either:
-- A boolean value of True if the content sufficiently meets the section requirements
-- A string containing specific, actionable feedback on what is missing or needs improvement
+Produce a Feedback object with:
+- coverage: One entry for every sub-section, using the number the sub-section is listed with, containing:
+  - score: How completely the accumulated content covers the sub-section, from 0.0 (not covered at all) to 1.0 (fully covered with sufficient depth and evidence)
+  - missing: What is missing or inadequate for the sub-section, or an empty string if it is fully covered
+- feedback: Overall feedback on gaps that span several sub-sections, or an empty string if there are none
 
 ## Guidelines for Feedback Generation
-When providing string feedback:
+When describing what is missing:
 - Be specific about what information is missing or inadequate
 - Prioritize the most critical gaps first
 - Frame feedback in a way that could guide further query generation
 - Focus on content needs rather than stylistic concerns
 - Indicate areas where contradictory information needs resolution
 - Suggest specific types of information that would address the gaps
+- Score each sub-section on its own: a well-covered sub-section keeps a high score even if others are missing
 
 ## Examples
 
 Example 1 (Sufficient content):
 ```
-True
-```
-
-Example 2 (Insufficient content):
-```
-"The content lacks specific examples of machine learning applications in healthcare. Additionally, there is insufficient information on the regulatory challenges of implementing AI in clinical settings. The ethical considerations sub-section requires more detailed discussion of patient privacy concerns and informed consent issues."
+coverage: [
+  {{"sub_section_index": 0, "score": 0.9, "missing": ""}},
+  {{"sub_section_index": 1, "score": 1.0, "missing": ""}}
+]
+feedback: ""
 ```
 
-Example 3 (Partial coverage):
+Example 2 (Partial coverage):
 ```
-"While the general concepts of blockchain are well covered, the content is missing technical details on consensus mechanisms mentioned in sub-section 2. The comparison between proof-of-work and proof-of-stake systems is particularly needed. Additionally, more recent developments (post-2022) in scalability solutions should be included to fully address sub-section 3."
+coverage: [
+  {{"sub_section_index": 0, "score": 0.9, "missing": ""}},
+  {{"sub_section_index": 1, "score": 0.3, "missing": "Technical details on consensus mechanisms, in particular a comparison between proof-of-work and proof-of-stake systems."}},
+  {{"sub_section_index": 2, "score": 0.5, "missing": "Recent developments (post-2022) in scalability solutions."}}
+]
+feedback: "Most sources predate 2022; prefer recent material."
 ```
 """
 
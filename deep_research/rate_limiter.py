@@ -0,0 +1,215 @@
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Dict, Tuple
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    A token bucket that refills continuously at `per_minute` units per minute.
+
+    Callers reserve units up front and the bucket is allowed to go into debt, so the wait
+    returned for a reservation is exactly the time needed for the budget to cover it. This
+    keeps callers in FIFO order and lets them sleep outside of the lock, which makes the
+    bucket usable from both threads and asyncio tasks.
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.available = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.available = min(self.per_minute, self.available + elapsed * self.per_minute / 60)
+        self.updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        """Reserves `amount` units and returns the number of seconds to wait before using them."""
+        self._refill(time.monotonic())
+        self.available -= amount
+        if self.available >= 0:
+            return 0.0
+        return -self.available * 60 / self.per_minute
+
+    def adjust(self, amount: float):
+        """Gives back (positive) or takes away (negative) units after the real cost of a call is known."""
+        self._refill(time.monotonic())
+        self.available = min(self.per_minute, self.available + amount)
+
+    def resize(self, per_minute: float):
+        self._refill(time.monotonic())
+        self.available = min(self.available, per_minute)
+        self.per_minute = per_minute
+
+
+class RateLimiter:
+    """
+    Process-wide rate limiter tracking a requests-per-minute and a tokens-per-minute budget
+    for each (provider, model) pair.
+
+    Budgets are passed on every call so they always follow the active `Configuration`; a
+    budget of 0 disables that limit. `acquire` blocks the calling thread, while `aacquire`
+    awaits, and both only wait as long as the budget actually requires.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str, str], TokenBucket] = {}
+
+    def _bucket(self, provider: str, model: str, kind: str, per_minute: float) -> TokenBucket:
+        key = (provider, model, kind)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(per_minute)
+        elif bucket.per_minute != per_minute:
+            bucket.resize(per_minute)
+        return bucket
+
+    def _reserve(
+            self,
+            provider: str,
+            model: str,
+            tokens: int,
+            requests_per_minute: int,
+            tokens_per_minute: int
+    ) -> float:
+        wait_seconds = 0.0
+        with self._lock:
+            if requests_per_minute > 0:
+                wait_seconds = max(wait_seconds, self._bucket(provider, model, "requests", requests_per_minute).reserve(1))
+            if tokens_per_minute > 0 and tokens > 0:
+                wait_seconds = max(wait_seconds, self._bucket(provider, model, "tokens", tokens_per_minute).reserve(tokens))
+        return wait_seconds
+
+    def acquire(
+            self,
+            provider: str,
+            model: str,
+            tokens: int = 0,
+            requests_per_minute: int = 0,
+            tokens_per_minute: int = 0
+    ) -> float:
+        """Blocks until one request of `tokens` tokens fits the budget and returns the seconds waited."""
+        wait_seconds = self._reserve(provider, model, tokens, requests_per_minute, tokens_per_minute)
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+        return wait_seconds
+
+    async def aacquire(
+            self,
+            provider: str,
+            model: str,
+            tokens: int = 0,
+            requests_per_minute: int = 0,
+            tokens_per_minute: int = 0
+    ) -> float:
+        """Async version of `acquire` that yields to the event loop while waiting."""
+        wait_seconds = self._reserve(provider, model, tokens, requests_per_minute, tokens_per_minute)
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+        return wait_seconds
+
+    def record_usage(self, provider: str, model: str, estimated_tokens: int, actual_tokens: int):
+        """Corrects the token budget once the real token usage of a call is known."""
+        with self._lock:
+            bucket = self._buckets.get((provider, model, "tokens"))
+            if bucket is not None:
+                bucket.adjust(estimated_tokens - actual_tokens)
+
+
+class _Waiter:
+    """A caller queued for a concurrency slot, woken through a thread event or an asyncio future."""
+
+    def __init__(self, event: threading.Event = None, future: asyncio.Future = None):
+        self.event = event
+        self.future = future
+        self.granted = False
+
+    def wake(self):
+        self.granted = True
+        if self.event is not None:
+            self.event.set()
+        else:
+            loop = self.future.get_loop()
+            loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+
+
+class ConcurrencyLimiter:
+    """
+    Process-wide cap on the number of calls of each kind (e.g. "llm" or "search") in flight at once.
+
+    The cap is shared by every thread and asyncio task of the process, so parallel sections,
+    concurrent searches and the reports of a batch together never exceed it. Waiting callers
+    are served in FIFO order; a freed slot is handed straight to the next one. Like the rate
+    limits, the cap is passed on every call and a cap of 0 disables it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._waiters: Dict[str, Deque[_Waiter]] = defaultdict(deque)
+
+    def _try_acquire(self, kind: str, max_in_flight: int) -> bool:
+        if max_in_flight <= 0 or (self._in_flight[kind] < max_in_flight and not self._waiters[kind]):
+            self._in_flight[kind] += 1
+            return True
+        return False
+
+    def _release(self, kind: str):
+        with self._lock:
+            if self._waiters[kind]:
+                self._waiters[kind].popleft().wake()
+            else:
+                self._in_flight[kind] -= 1
+                if not self._in_flight[kind]:
+                    # Kinds can be per run (e.g. the section slots of a thread), forget them once idle
+                    del self._in_flight[kind]
+                    del self._waiters[kind]
+
+    def in_flight(self, kind: str) -> int:
+        """Returns the number of calls of `kind` currently holding a slot."""
+        with self._lock:
+            return self._in_flight[kind]
+
+    @contextmanager
+    def slot(self, kind: str, max_in_flight: int):
+        """Holds one slot of `kind` for the duration of the block, blocking the thread until one is free."""
+        with self._lock:
+            waiter = None if self._try_acquire(kind, max_in_flight) else _Waiter(event=threading.Event())
+            if waiter is not None:
+                self._waiters[kind].append(waiter)
+        if waiter is not None:
+            waiter.event.wait()
+        try:
+            yield
+        finally:
+            self._release(kind)
+
+    @asynccontextmanager
+    async def aslot(self, kind: str, max_in_flight: int):
+        """Async version of `slot` that yields to the event loop while waiting."""
+        with self._lock:
+            waiter = None if self._try_acquire(kind, max_in_flight) else _Waiter(future=asyncio.get_running_loop().create_future())
+            if waiter is not None:
+                self._waiters[kind].append(waiter)
+        if waiter is not None:
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                with self._lock:
+                    if not waiter.granted:
+                        self._waiters[kind].remove(waiter)
+                if waiter.granted:
+                    self._release(kind)
+                raise
+        try:
+            yield
+        finally:
+            self._release(kind)
+
+
+rate_limiter = RateLimiter()
+concurrency_limiter = ConcurrencyLimiter()
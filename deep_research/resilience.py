@@ -0,0 +1,439 @@
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from .configuration import Configuration
+
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors (529 is Anthropic's "overloaded")
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504, 529})
+# Transient errors recognised by class name, so the provider packages do not have to be imported to classify them
+RETRYABLE_ERROR_NAMES = frozenset({
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError", "OverloadedError",
+    "ServiceUnavailable", "ResourceExhausted", "DeadlineExceeded", "TooManyRequests", "UsageLimitExceededError",
+    "ConnectError", "ConnectTimeout", "ReadError", "ReadTimeout", "WriteTimeout", "PoolTimeout",
+    "RemoteProtocolError", "ConnectionError", "ChunkedEncodingError", "Timeout",
+})
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+
+@dataclass(frozen=True)
+class ResiliencePolicy:
+    """The retry, timeout, circuit breaker and hedging settings of one kind of call; 0 disables a setting."""
+    max_retries: int = 0
+    timeout_seconds: float = 0
+    backoff_seconds: float = 1.0
+    max_backoff_seconds: float = 30.0
+    breaker_failures: int = 0
+    breaker_reset_seconds: float = 30
+    hedge_after_seconds: float = 0
+
+
+def llm_policy(configurable: Configuration) -> ResiliencePolicy:
+    """Return the resilience policy of LLM calls."""
+    return ResiliencePolicy(
+        max_retries=configurable.llm_max_retries,
+        timeout_seconds=configurable.llm_timeout_seconds,
+        backoff_seconds=configurable.retry_backoff_seconds,
+        max_backoff_seconds=configurable.retry_max_backoff_seconds,
+        breaker_failures=configurable.circuit_breaker_failures,
+        breaker_reset_seconds=configurable.circuit_breaker_reset_seconds,
+        hedge_after_seconds=configurable.llm_hedge_after_seconds
+    )
+
+
+def search_policy(configurable: Configuration) -> ResiliencePolicy:
+    """Return the resilience policy of Tavily searches."""
+    return ResiliencePolicy(
+        max_retries=configurable.search_max_retries,
+        timeout_seconds=configurable.search_timeout_seconds,
+        backoff_seconds=configurable.retry_backoff_seconds,
+        max_backoff_seconds=configurable.retry_max_backoff_seconds,
+        breaker_failures=configurable.circuit_breaker_failures,
+        breaker_reset_seconds=configurable.circuit_breaker_reset_seconds,
+        hedge_after_seconds=configurable.search_hedge_after_seconds
+    )
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for status_code in (
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+        getattr(error, "code", None),
+    ):
+        if isinstance(status_code, int):
+            return status_code
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Return whether an error is transient: a timeout, a connection error, a rate limit or a server error."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    status_code = _status_code(error)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Return the delay requested by the `Retry-After` (or `retry-after-ms`) header of an HTTP error, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return max(float(headers["retry-after-ms"]) / 1000, 0.0)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_seconds(retry: int, policy: ResiliencePolicy, error: BaseException) -> float:
+    """
+    Return the delay before retry number `retry` (from 0) of a failed call.
+
+    The delay is drawn uniformly up to an exponentially growing cap ("full jitter"), so the
+    callers that failed together do not retry together. A `Retry-After` sent by the server
+    takes precedence, with a little jitter on top.
+    """
+    retry_after = retry_after_seconds(error)
+    if retry_after is not None:
+        return retry_after + random.uniform(0, policy.backoff_seconds)
+    return random.uniform(0, min(policy.max_backoff_seconds, policy.backoff_seconds * 2 ** retry))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker of one provider.
+
+    After `breaker_failures` transient failures in a row the circuit opens and calls fail
+    fast with `CircuitOpenError`. Once `breaker_reset_seconds` have passed, a single trial
+    call is let through: its success closes the circuit, its failure opens it again, and if
+    it is cancelled or fails with a non-retryable error the next call becomes the trial.
+    Non-retryable errors (bad requests, unparsable output) say nothing about the health of
+    the provider, so they never change the failure count or the state of the circuit. The breaker is not thread-safe on its
+    own, `Resilience` guards it with its lock.
+    """
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    def allow(self, policy: ResiliencePolicy) -> bool:
+        if policy.breaker_failures <= 0 or self.opened_at is None:
+            return True
+        if self.trial_in_flight or time.monotonic() - self.opened_at < policy.breaker_reset_seconds:
+            return False
+        self.trial_in_flight = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def release_trial(self):
+        """Let another call be the trial, after the one in flight ended without an outcome."""
+        self.trial_in_flight = False
+
+    def record_failure(self, policy: ResiliencePolicy) -> bool:
+        """Count a transient failure and return whether it opened the circuit."""
+        self.failures += 1
+        if policy.breaker_failures > 0 and (self.trial_in_flight or (self.opened_at is None and self.failures >= policy.breaker_failures)):
+            self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+            return True
+        return False
+
+
+class Resilience:
+    """
+    Process-wide retry, timeout, circuit breaker and hedging layer for provider calls.
+
+    Calls are grouped by a key, the LLM provider or "tavily", which owns a circuit breaker
+    and a set of counters. Like the rate limiter, the settings are passed on every call as a
+    `ResiliencePolicy` so they always follow the active `Configuration`. `call` runs a
+    blocking function and `acall` a coroutine function; each attempt calls it again.
+
+    When the policy has a timeout or hedging, sync attempts run on a shared thread pool so
+    they can be waited for with a deadline, counted from the moment the attempt starts
+    running rather than from when it was queued; waiting for a free worker is bounded by the
+    same timeout, so a pool saturated by abandoned attempts makes calls time out instead of
+    hanging. An attempt that times out or loses a hedge
+    is cancelled if it has not started yet and abandoned otherwise; async attempts are
+    always cancelled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = defaultdict(CircuitBreaker)
+        self._counters: Dict[str, Counter] = defaultdict(Counter)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _count(self, key: str, event: str, amount: int = 1):
+        with self._lock:
+            self._counters[key][event] += amount
+
+    def counters(self) -> Dict[str, Dict[str, int]]:
+        """
+        Return how often each mechanism fired, per key: "calls", "retries", "timeouts",
+        "failures" (calls that failed for good), "circuit_opened", "circuit_rejected",
+        "hedged" (duplicate requests sent) and "hedge_wins" (duplicates that answered first).
+        """
+        with self._lock:
+            return {key: dict(counter) for key, counter in self._counters.items()}
+
+    def _before_attempt(self, key: str, policy: ResiliencePolicy):
+        with self._lock:
+            allowed = self._breakers[key].allow(policy)
+            self._counters[key]["calls" if allowed else "circuit_rejected"] += 1
+        if not allowed:
+            raise CircuitOpenError(f"The circuit breaker of {key} is open after repeated failures, failing fast.")
+
+    def _after_failure(
+            self,
+            key: str,
+            policy: ResiliencePolicy,
+            error: Exception,
+            retry: int,
+            can_retry: Optional[Callable[[], bool]]
+    ) -> Optional[float]:
+        """Update the breaker and counters after a failed attempt and return the delay before retrying, or None to give up."""
+        retryable = is_retryable(error)
+        circuit_opened = False
+        with self._lock:
+            breaker = self._breakers[key]
+            if not retryable:
+                # The request itself is at fault, which says nothing about the provider
+                breaker.release_trial()
+            elif breaker.record_failure(policy):
+                circuit_opened = True
+                self._counters[key]["circuit_opened"] += 1
+                print(f"Opening the circuit breaker of {key} for {policy.breaker_reset_seconds}s after {breaker.failures} failures.")
+            if isinstance(error, TimeoutError):
+                self._counters[key]["timeouts"] += 1
+            if not retryable or circuit_opened or retry >= policy.max_retries or (can_retry is not None and not can_retry()):
+                self._counters[key]["failures"] += 1
+                return None
+            self._counters[key]["retries"] += 1
+
+        delay = backoff_seconds(retry, policy, error)
+        print(f"Call to {key} failed ({type(error).__name__}: {error}), retrying in {delay:.1f}s ({retry + 1}/{policy.max_retries}).")
+        return delay
+
+    def _after_success(self, key: str):
+        with self._lock:
+            self._breakers[key].record_success()
+
+    def _after_cancel(self, key: str):
+        with self._lock:
+            self._breakers[key].release_trial()
+
+    def call(
+            self,
+            key: str,
+            func: Callable[[], T],
+            policy: ResiliencePolicy,
+            can_retry: Optional[Callable[[], bool]] = None,
+            hedge: bool = True
+    ) -> T:
+        """
+        Call `func` with the retries, timeout, circuit breaker and hedging of `policy`.
+
+        Args:
+            key: The provider the call goes to, which owns the circuit breaker and counters.
+            func: The function making the call; it is called again for every attempt.
+            policy: The resilience settings of the call.
+            can_retry: Optional check run after a failure, e.g. to not retry a stream that
+                already produced output.
+            hedge: Whether the call may be hedged, False for calls with side effects.
+
+        Returns:
+            The result of the first successful attempt.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker of `key` is open.
+            Exception: The error of the last attempt, once it is not retryable or the retries are exhausted.
+        """
+        retry = 0
+        while True:
+            self._before_attempt(key, policy)
+            try:
+                result = self._attempt(key, func, policy, hedge)
+            except Exception as error:
+                delay = self._after_failure(key, policy, error, retry, can_retry)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                retry += 1
+                continue
+            except BaseException:
+                # A cancelled or interrupted attempt says nothing about the provider, but must not hold the trial
+                self._after_cancel(key)
+                raise
+            self._after_success(key)
+            return result
+
+    async def acall(
+            self,
+            key: str,
+            func: Callable[[], Awaitable[T]],
+            policy: ResiliencePolicy,
+            can_retry: Optional[Callable[[], bool]] = None,
+            hedge: bool = True
+    ) -> T:
+        """Async version of `call`, where `func` returns a new coroutine for every attempt."""
+        retry = 0
+        while True:
+            self._before_attempt(key, policy)
+            try:
+                result = await self._aattempt(key, func, policy, hedge)
+            except Exception as error:
+                delay = self._after_failure(key, policy, error, retry, can_retry)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                retry += 1
+                continue
+            except BaseException:
+                # A cancelled or interrupted attempt says nothing about the provider, but must not hold the trial
+                self._after_cancel(key)
+                raise
+            self._after_success(key)
+            return result
+
+    def _submit(self, func: Callable[[], T], settled: threading.Event) -> Tuple[Future, threading.Event]:
+        """
+        Queue an attempt on the thread pool and return its future and an event set once it starts running.
+
+        `settled` is shared by the attempts of a call and set once one of them succeeds or the
+        call gives up; an attempt still queued at that point is skipped instead of being sent.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="resilience")
+        started = threading.Event()
+
+        def run() -> T:
+            if settled.is_set():
+                raise CancelledError()
+            started.set()
+            result = func()
+            settled.set()
+            return result
+
+        # Each attempt runs in its own copy of the caller's context, so it is counted in the metrics of the calling node
+        return self._executor.submit(contextvars.copy_context().run, run), started
+
+    def _attempt(self, key: str, func: Callable[[], T], policy: ResiliencePolicy, hedge: bool) -> T:
+        hedge_after = policy.hedge_after_seconds if hedge else 0
+        if policy.timeout_seconds <= 0 and hedge_after <= 0:
+            return func()
+
+        settled = threading.Event()
+        first, started = self._submit(func, settled)
+        futures = [first]
+        try:
+            # Time spent queued behind other attempts does not count against the timeout of
+            # the attempt, but it is bounded by it in case the pool is full of abandoned attempts
+            if not started.wait(policy.timeout_seconds if policy.timeout_seconds > 0 else None):
+                raise TimeoutError(f"Call to {key} waited {policy.timeout_seconds} seconds for a free worker.")
+            deadline = time.monotonic() + policy.timeout_seconds if policy.timeout_seconds > 0 else None
+            return self._wait_attempt(key, futures, func, settled, policy, hedge_after, deadline)
+        finally:
+            settled.set()
+            for future in futures:
+                future.cancel()
+
+    def _wait_attempt(
+            self,
+            key: str,
+            futures: List[Future],
+            func: Callable[[], T],
+            settled: threading.Event,
+            policy: ResiliencePolicy,
+            hedge_after: float,
+            deadline: Optional[float]
+    ) -> T:
+        if hedge_after > 0:
+            done, _ = wait(futures, timeout=hedge_after if deadline is None else min(hedge_after, deadline - time.monotonic()))
+            if not done and (deadline is None or time.monotonic() < deadline):
+                self._count(key, "hedged")
+                futures.append(self._submit(func, settled)[0])
+
+        errors: List[Exception] = []
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=None if deadline is None else max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        self._count(key, "hedge_wins")
+                    return future.result()
+                errors.append(future.exception())
+        if errors and not pending:
+            raise errors[0]
+        raise TimeoutError(f"Call to {key} timed out after {policy.timeout_seconds} seconds.")
+
+    async def _aattempt(self, key: str, func: Callable[[], Awaitable[T]], policy: ResiliencePolicy, hedge: bool) -> T:
+        hedge_after = policy.hedge_after_seconds if hedge else 0
+        if hedge_after <= 0:
+            if policy.timeout_seconds <= 0:
+                return await func()
+            try:
+                return await asyncio.wait_for(func(), policy.timeout_seconds)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Call to {key} timed out after {policy.timeout_seconds} seconds.") from None
+
+        deadline = time.monotonic() + policy.timeout_seconds if policy.timeout_seconds > 0 else None
+        tasks = [asyncio.ensure_future(func())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after if deadline is None else min(hedge_after, deadline - time.monotonic()))
+            if not done and (deadline is None or time.monotonic() < deadline):
+                self._count(key, "hedged")
+                tasks.append(asyncio.ensure_future(func()))
+
+            errors: List[BaseException] = []
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=None if deadline is None else max(deadline - time.monotonic(), 0), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self._count(key, "hedge_wins")
+                        return task.result()
+                    errors.append(task.exception())
+            if errors and not pending:
+                raise errors[0]
+            raise TimeoutError(f"Call to {key} timed out after {policy.timeout_seconds} seconds.")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+resilience = Resilience()
@@ -0,0 +1,250 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+from tavily import AsyncTavilyClient, TavilyClient
+from .cache import get_cache
+from .configuration import Configuration
+from .documents import get_document_store
+from .metrics import record_search
+from .preprocess import find_shared_lines, preprocess_content
+from .rate_limiter import concurrency_limiter, rate_limiter
+from .resilience import resilience, search_policy
+from .struct import Query, SearchResult, SearchResults
+import asyncio
+import contextvars
+import hashlib
+import time
+
+
+@lru_cache(maxsize=None)
+def get_tavily_client() -> TavilyClient:
+    """Return the process-wide Tavily client, created on first use."""
+    return TavilyClient()
+
+
+@lru_cache(maxsize=None)
+def get_async_tavily_client() -> AsyncTavilyClient:
+    """Return the process-wide async Tavily client, created on first use."""
+    return AsyncTavilyClient()
+
+
+def search_cache_key(query: str, max_results: int, include_raw_content: bool) -> str:
+    """Build the search cache key from the normalized query text and the search parameters."""
+    normalized_query = " ".join(query.lower().split())
+    return hashlib.sha256(f"{normalized_query}|{max_results}|{include_raw_content}".encode("utf-8")).hexdigest()
+
+
+def _get_search_cache(configurable: Configuration):
+    """Return the search cache, or None when neither caching nor offline mode is enabled."""
+    if not (configurable.search_cache_enabled or configurable.search_offline):
+        return None
+    return get_cache(
+        configurable.search_cache_path,
+        configurable.search_cache_max_entries,
+        configurable.search_cache_ttl_seconds
+    )
+
+
+def search_cache_stats(configurable: Configuration) -> Optional[Dict[str, int]]:
+    """Return the hit, miss and eviction counters of the search cache, or None when it is not used."""
+    cache = _get_search_cache(configurable)
+    return cache.stats() if cache is not None else None
+
+
+def _to_search_results(query: Query, response: dict, configurable: Configuration) -> SearchResults:
+    """Keep the results of a Tavily response that have a URL, a title and raw content, storing their documents."""
+    document_store = get_document_store(configurable)
+    search_content = []
+    removed_tokens = 0
+    # Chrome lines are told apart from content by being repeated across the pages of the response
+    shared_lines = find_shared_lines(result['raw_content'] for result in response["results"] if result['raw_content'])
+    for result in response["results"]:
+        if result['raw_content'] and result['url'] and result['title']:
+            document_id = document_store.document_id_for_url(result['url'])
+            if document_id is None:
+                raw_content, removed = preprocess_content(
+                    result['raw_content'],
+                    configurable.max_tokens_per_document,
+                    clean=configurable.clean_search_content,
+                    shared_lines=shared_lines
+                )
+                removed_tokens += removed
+                document_id = document_store.put(result['url'], raw_content)
+            search_content.append(SearchResult(url=result['url'], title=result['title'], document_id=document_id))
+    return SearchResults(query=query, results=search_content, removed_tokens=removed_tokens)
+
+
+def search_query(query: Query, configurable: Configuration) -> SearchResults:
+    """
+    Run a single Tavily search and keep the results that have a URL, a title and raw content.
+
+    The raw content of every result is cleaned of boilerplate, truncated to the
+    `max_tokens_per_document` budget and kept in the run's document store; the returned
+    results only reference it. A URL already in the store is not processed again.
+
+    The Tavily call goes through the shared resilience layer: each attempt gets
+    `search_timeout_seconds`, transient errors are retried with backoff up to
+    `search_max_retries` times, and the Tavily circuit breaker fails fast after repeated failures.
+
+    When the search cache is enabled, responses are served from and stored in the on-disk
+    cache. In offline mode the cache is the only source, regardless of the TTL of its entries:
+    a query that is not cached yields no results and Tavily is never contacted.
+
+    Args:
+        query: The query to search for.
+        configurable: The configuration holding the search depth, timeout, cache and rate limit settings.
+
+    Returns:
+        The search results for the query.
+    """
+    cache = _get_search_cache(configurable)
+    cache_key = search_cache_key(query.query, configurable.search_depth, True)
+    # An offline replay must not expire the cache it depends on
+    response: Optional[dict] = cache.get(cache_key, ignore_ttl=configurable.search_offline) if cache is not None else None
+
+    if response is None and configurable.search_offline:
+        print(f"Search for '{query.query}' is not cached, skipping it in offline mode.")
+        return SearchResults(query=query, results=[])
+
+    if response is not None:
+        record_search(cached=True)
+    else:
+        wait_started_at = time.monotonic()
+        rate_limiter.acquire("tavily", "search", requests_per_minute=configurable.search_requests_per_minute)
+        with concurrency_limiter.slot("search", configurable.max_concurrent_searches):
+            record_search(wait_seconds=time.monotonic() - wait_started_at)
+            response = resilience.call(
+                "tavily",
+                lambda: get_tavily_client().search(
+                    query=query.query,
+                    max_results=configurable.search_depth,
+                    include_raw_content=True,
+                    timeout=configurable.search_timeout_seconds
+                ),
+                search_policy(configurable)
+            )
+        if cache is not None:
+            cache.set(cache_key, response)
+
+    return _to_search_results(query, response, configurable)
+
+
+async def asearch_query(query: Query, configurable: Configuration) -> SearchResults:
+    """
+    Async version of `search_query`, using the async Tavily client and rate limiter.
+
+    The cache and the document store are accessed on a worker thread, so their SQLite commits
+    and file writes do not block the event loop.
+    """
+    cache = _get_search_cache(configurable)
+    cache_key = search_cache_key(query.query, configurable.search_depth, True)
+    # An offline replay must not expire the cache it depends on
+    response: Optional[dict] = await asyncio.to_thread(cache.get, cache_key, configurable.search_offline) if cache is not None else None
+
+    if response is None and configurable.search_offline:
+        print(f"Search for '{query.query}' is not cached, skipping it in offline mode.")
+        return SearchResults(query=query, results=[])
+
+    if response is not None:
+        record_search(cached=True)
+    else:
+        wait_started_at = time.monotonic()
+        await rate_limiter.aacquire("tavily", "search", requests_per_minute=configurable.search_requests_per_minute)
+        async with concurrency_limiter.aslot("search", configurable.max_concurrent_searches):
+            record_search(wait_seconds=time.monotonic() - wait_started_at)
+            response = await resilience.acall(
+                "tavily",
+                lambda: get_async_tavily_client().search(
+                    query=query.query,
+                    max_results=configurable.search_depth,
+                    include_raw_content=True,
+                    timeout=configurable.search_timeout_seconds
+                ),
+                search_policy(configurable)
+            )
+        if cache is not None:
+            await asyncio.to_thread(cache.set, cache_key, response)
+
+    return await asyncio.to_thread(_to_search_results, query, response, configurable)
+
+
+def search_queries(
+        queries: List[Query],
+        configurable: Configuration,
+        on_result: Optional[Callable[[int, SearchResults], None]] = None
+) -> List[SearchResults]:
+    """
+    Run the Tavily searches for several queries concurrently.
+
+    The queries are spread over a thread pool of at most `max_search_workers` workers. The
+    attempts of each query are bounded by `search_timeout_seconds` in `search_query`; a query
+    that still fails or times out after its retries yields an empty SearchResults instead of
+    failing the others. The results keep the order of `queries`.
+
+    Args:
+        queries: The queries to search for.
+        configurable: The configuration holding the worker count, timeout and search settings.
+        on_result: Optional callback receiving the index and results of each successful query
+            as soon as it completes, from the worker thread that ran it.
+
+    Returns:
+        One SearchResults per query, in the order of `queries`.
+    """
+    if not queries:
+        return []
+
+    max_workers = max(1, min(configurable.max_search_workers, len(queries)))
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tavily-search")
+    def search(index: int, query: Query) -> SearchResults:
+        search_result = search_query(query, configurable)
+        if on_result is not None:
+            on_result(index, search_result)
+        return search_result
+
+    # Each search runs in a copy of the caller's context, so it is counted in the metrics of the calling node
+    futures = [executor.submit(contextvars.copy_context().run, search, index, query) for index, query in enumerate(queries)]
+
+    search_results = []
+    for query, future in zip(queries, futures):
+        try:
+            search_results.append(future.result())
+        except TimeoutError:
+            print(f"Search for '{query.query}' timed out after {configurable.search_timeout_seconds} seconds, skipping it.")
+            search_results.append(SearchResults(query=query, results=[]))
+        except Exception as e:
+            print(f"Search for '{query.query}' failed, skipping it: {e}")
+            search_results.append(SearchResults(query=query, results=[]))
+
+    executor.shutdown()
+    return search_results
+
+
+async def asearch_queries(
+        queries: List[Query],
+        configurable: Configuration,
+        on_result: Optional[Callable[[int, SearchResults], None]] = None
+) -> List[SearchResults]:
+    """
+    Async version of `search_queries`.
+
+    At most `max_search_workers` searches of the call are in flight at once; a query that
+    still fails or times out after its retries yields an empty SearchResults. The results
+    keep the order of `queries`. `on_result` is called on the event loop.
+    """
+    semaphore = asyncio.Semaphore(max(1, configurable.max_search_workers))
+
+    async def run(index: int, query: Query) -> SearchResults:
+        async with semaphore:
+            try:
+                search_result = await asearch_query(query, configurable)
+            except TimeoutError:
+                print(f"Search for '{query.query}' timed out after {configurable.search_timeout_seconds} seconds, skipping it.")
+                return SearchResults(query=query, results=[])
+            except Exception as e:
+                print(f"Search for '{query.query}' failed, skipping it: {e}")
+                return SearchResults(query=query, results=[])
+        if on_result is not None:
+            on_result(index, search_result)
+        return search_result
+
+    return list(await asyncio.gather(*(run(index, query) for index, query in enumerate(queries))))
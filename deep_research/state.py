@@ -2,7 +2,15 @@ from typing import Annotated, List
 from langchain_core.messages import BaseMessage
 import operator
 from typing import TypedDict
-from .struct import Section, Feedback, Query, SearchResults
+from .struct import Section, SectionContent, Feedback, Query, SearchResults
+
+
+def merge_section_content(left: List[SectionContent], right: List[SectionContent]) -> List[SectionContent]:
+    """Merges section contents keyed by section index, so the report keeps the outline order
+    no matter in which order the sections finish."""
+    merged = {section.section_index: section for section in left}
+    merged.update({section.section_index: section for section in right})
+    return [merged[index] for index in sorted(merged)]
 
 
 class AgentState(TypedDict):
@@ -12,18 +20,34 @@ class AgentState(TypedDict):
     report_structure: str
     sections: List[Section]
     current_section_index: int
-    final_section_content: Annotated[List[str], operator.add]
+    final_section_content: Annotated[List[SectionContent], merge_section_content]
     search_results: Annotated[List[SearchResults], operator.add]
+    final_report_content: str
 
 
 class ResearchState(TypedDict):
     section: Section
-    knowledge: str
+    knowledge_id: str
     reflection_feedback: Feedback
     generated_queries: List[Query]
     searched_queries: Annotated[List[Query], operator.add]
     search_results: Annotated[List[SearchResults], operator.add]
-    accumulated_content: str
+    accumulated_content_id: str
+    accumulated_document_ids: List[str]
+    partial_summary_ids: Annotated[List[str], operator.add]
+    accumulated_summary_count: int
+    reflection_count: int
+    final_section_content: List[SectionContent]
+    current_section_index: int
+
+
+class SectionSearchOutput(TypedDict):
+    reflection_feedback: Feedback
+    generated_queries: List[Query]
+    searched_queries: List[Query]
+    search_results: List[SearchResults]
+    accumulated_content_id: str
+    accumulated_document_ids: List[str]
+    partial_summary_ids: List[str]
+    accumulated_summary_count: int
     reflection_count: int
-    final_section_content: List[str]
-    current_section_index: int
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Union
+from typing import List
 
 
 class Section(BaseModel):
@@ -22,20 +22,33 @@ class Queries(BaseModel):
 class SearchResult(BaseModel):
     url: str = Field(..., description="The url of the search result")
     title: str = Field(..., description="The title of the search result")
-    raw_content: str = Field(..., description="The raw content of the search result")
+    document_id: str = Field(..., description="The id of the raw content of the search result in the run's document store")
 
 
 class SearchResults(BaseModel):
     query: Query = Field(..., description="The search query that was used to retrieve the raw content")
     results: List[SearchResult] = Field(..., description="The search results")
+    removed_tokens: int = Field(0, description="The estimated number of tokens removed from the raw content by preprocessing")
+
+
+class SubSectionCoverage(BaseModel):
+    sub_section_index: int = Field(..., description="The number of the sub-section in the section, as listed in the input")
+    score: float = Field(..., description="How completely the accumulated content covers the sub-section, from 0.0 (not at all) to 1.0 (fully)")
+    missing: str = Field("", description="Specific, actionable description of what is missing or incorrect for this sub-section, empty if it is fully covered")
 
 
 class Feedback(BaseModel):
-    feedback: Union[str, bool] = Field(..., description="Feedback on the report structure. If the content is good for the section, return True (boolean), otherwise return a string of feedback on what is missing or incorrect.")
+    coverage: List[SubSectionCoverage] = Field(..., description="The coverage of every sub-section of the section, one entry per sub-section")
+    feedback: str = Field("", description="Overall feedback on what is missing or incorrect across the section, empty if the content is good for the section")
+
+
+class SectionContent(BaseModel):
+    section_index: int = Field(..., description="The position of the section in the report outline")
+    content_id: str = Field(..., description="The blob id of the final formatted content of the section")
 
 
 class SectionOutput(BaseModel):
-    final_section_content: List[str] = Field(..., description="The final section content")
+    final_section_content: List[SectionContent] = Field(..., description="The final section content")
     search_results: List[SearchResults] = Field(..., description="The search results")
 
 
@@ -1,13 +1,28 @@
-from typing import Literal
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_ollama import ChatOllama
+from typing import Any, Callable, Literal, Optional
+from functools import lru_cache
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, message_chunk_to_message, message_to_dict, messages_from_dict, messages_to_dict
+from langchain_core.prompt_values import PromptValue
+from langchain_core.utils.json import parse_partial_json
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel
+import asyncio
+import hashlib
+import json
 import os
+import time
 from dotenv import load_dotenv
+from .configuration import Configuration
+from .cache import get_cache
+from .metrics import record_llm_cache_hit, record_llm_call
+from .rate_limiter import concurrency_limiter, rate_limiter
+from .resilience import llm_policy, resilience
 
 load_dotenv()
 
+CHARS_PER_TOKEN = 4
+
 def init_llm(
         provider: Literal["openai", "anthropic", "google", "ollama"],
         model: str,
@@ -18,7 +33,8 @@ def init_llm(
 
     This function creates a chat interface for different LLM providers including OpenAI, 
     Anthropic, Google, and Ollama. It handles API key validation and configuration for
-    each provider.
+    each provider. The integration package of a provider is only imported once the provider
+    is selected, so a run does not pay the import cost of the providers it does not use.
 
     Args:
         provider: The LLM provider to use. Must be one of "openai", "anthropic", "google", or "ollama".
@@ -36,14 +52,392 @@ def init_llm(
     if provider == "openai":
         if "OPENAI_API_KEY" not in os.environ:
             raise ValueError("OPENAI_API_KEY is not set. Please set it in your environment variables.")
+        from langchain_openai import ChatOpenAI
         return ChatOpenAI(model=model, temperature=temperature, api_key=os.environ["OPENAI_API_KEY"])
     elif provider == "anthropic":
         if "ANTHROPIC_API_KEY" not in os.environ:
             raise ValueError("ANTHROPIC_API_KEY is not set. Please set it in your environment variables.")
+        from langchain_anthropic import ChatAnthropic
         return ChatAnthropic(model=model, temperature=temperature, api_key=os.environ["ANTHROPIC_API_KEY"])
     elif provider == "google":
         if "GOOGLE_API_KEY" not in os.environ:
             raise ValueError("GOOGLE_API_KEY is not set. Please set it in your environment variables.")
+        from langchain_google_genai import ChatGoogleGenerativeAI
         return ChatGoogleGenerativeAI(model=model, temperature=temperature, api_key=os.environ["GOOGLE_API_KEY"])
     elif provider == "ollama":
-        return ChatOllama(model=model, temperature=temperature)
\ No newline at end of file
+        from langchain_ollama import ChatOllama
+        return ChatOllama(model=model, temperature=temperature)
+
+
+@lru_cache(maxsize=None)
+def get_llm(
+        provider: Literal["openai", "anthropic", "google", "ollama"],
+        model: str,
+        temperature: float = 0.5,
+        schema: Optional[type[BaseModel]] = None,
+        include_raw: bool = False
+) -> BaseChatModel | Runnable:
+    """
+    Return the process-wide chat model, or structured-output runnable, for the given settings.
+
+    Models are built with `init_llm` the first time a (provider, model, temperature, schema)
+    combination is requested and reused afterwards, so every node shares the same HTTP clients
+    and their keep-alive connection pools, and the schema is converted for tool calling only once.
+
+    Args:
+        provider: The LLM provider to use. Must be one of "openai", "anthropic", "google", or "ollama".
+        model: The specific model name/identifier to use with the chosen provider.
+        temperature: Controls randomness in the model's output. Defaults to 0.5.
+        schema: Optional pydantic model the output should be structured as.
+        include_raw: Whether the structured-output runnable also returns the raw model message,
+            which carries the token usage and is needed to stream its tokens.
+
+    Returns:
+        The chat model, or the model bound to `schema` with `with_structured_output`.
+    """
+    if schema is not None:
+        return get_llm(provider, model, temperature).with_structured_output(schema, include_raw=include_raw)
+    return init_llm(provider=provider, model=model, temperature=temperature)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Roughly estimate the number of tokens in a text.
+
+    Uses the common approximation of four characters per token, which is good enough to
+    budget prompts and rate limits before the provider reports the exact usage.
+    """
+    return len(text) // CHARS_PER_TOKEN
+
+
+def estimate_tokens(messages: list[BaseMessage]) -> int:
+    """Roughly estimate the number of tokens in a list of messages."""
+    return sum(count_tokens(str(message.content)) for message in messages) + 1
+
+
+def llm_cache_key(messages: list[BaseMessage], configurable: Configuration, schema: Optional[type[BaseModel]] = None) -> str:
+    """Build the LLM cache key from the rendered messages, the model settings and the output schema."""
+    payload = {
+        "provider": configurable.provider,
+        "model": configurable.model,
+        "temperature": configurable.temperature,
+        "schema": schema.model_json_schema() if schema is not None else None,
+        "messages": messages_to_dict(messages)
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _read_llm_cache(messages: list[BaseMessage], configurable: Configuration, schema: Optional[type[BaseModel]]):
+    """Return the LLM cache, the cache key and the cached result (or None) when the cache is enabled."""
+    if not configurable.llm_cache_enabled:
+        return None, None, None
+    cache = get_cache(configurable.llm_cache_path, configurable.llm_cache_max_entries, configurable.llm_cache_ttl_seconds)
+    cache_key = llm_cache_key(messages, configurable, schema)
+    cached = cache.get(cache_key)
+    if cached is None:
+        return cache, cache_key, None
+    return cache, cache_key, schema.model_validate(cached) if schema is not None else messages_from_dict([cached])[0]
+
+
+def _finish_llm_call(
+        result,
+        raw_message,
+        estimated_tokens: int,
+        wait_seconds: float,
+        configurable: Configuration,
+        schema: Optional[type[BaseModel]],
+        cache,
+        cache_key: Optional[str]
+):
+    """
+    Correct the rate limiter reservation with the reported usage, record the call in the
+    metrics of the current node and store the result in the cache.
+    """
+    if isinstance(raw_message, AIMessage) and raw_message.usage_metadata:
+        rate_limiter.record_usage(
+            configurable.provider,
+            configurable.model,
+            estimated_tokens,
+            raw_message.usage_metadata["total_tokens"]
+        )
+        input_tokens = raw_message.usage_metadata["input_tokens"]
+        output_tokens = raw_message.usage_metadata["output_tokens"]
+    else:
+        input_tokens = estimated_tokens
+        output_tokens = count_tokens(result.model_dump_json() if schema is not None else str(result.content))
+    record_llm_call(configurable.model, input_tokens, output_tokens, wait_seconds)
+    if cache is not None:
+        cache.set(cache_key, result.model_dump(mode="json") if schema is not None else message_to_dict(result))
+
+
+def _unwrap_output(output, schema: Optional[type[BaseModel]]):
+    """Return the result of an LLM call and its raw message, from the output of `get_llm(..., include_raw=True)` for structured output."""
+    if schema is None:
+        return output, output
+    if output.get("parsing_error") is not None:
+        raise output["parsing_error"]
+    return output["parsed"], output["raw"]
+
+
+def _streamed_field_text(raw_message: AIMessage, stream_field: str) -> str:
+    """
+    Return the text streamed so far for one field of a structured output.
+
+    Structured output arrives as tool call arguments (or JSON content), so the partial JSON is
+    parsed as it grows. Models without native streaming yield a single complete AIMessage, whose
+    tool call arguments are already parsed.
+    """
+    tool_call_chunks = getattr(raw_message, "tool_call_chunks", None)
+    if tool_call_chunks:
+        partial_json = tool_call_chunks[0]["args"]
+    elif raw_message.tool_calls:
+        value = raw_message.tool_calls[0]["args"].get(stream_field)
+        return value if isinstance(value, str) else ""
+    else:
+        partial_json = raw_message.content
+    if not isinstance(partial_json, str) or not partial_json:
+        return ""
+    try:
+        value = parse_partial_json(partial_json).get(stream_field)
+    except (ValueError, AttributeError):
+        return ""
+    return value if isinstance(value, str) else ""
+
+
+class _TokenGate:
+    """
+    Passes the streamed tokens of a call to `on_token`, only from its latest attempt.
+
+    An attempt abandoned by a timeout may still produce tokens; they are dropped so the
+    retry does not interleave with it. Once a token got through, the call is no longer
+    retried, as its output has already been consumed.
+    """
+
+    def __init__(self, on_token: Callable[[str], None]):
+        self.on_token = on_token
+        self.attempts = 0
+        self.started = False
+
+    def attempt(self) -> Callable[[str], None]:
+        self.attempts += 1
+        attempt = self.attempts
+
+        def forward(token: str):
+            if attempt == self.attempts:
+                self.started = True
+                self.on_token(token)
+        return forward
+
+    def can_retry(self) -> bool:
+        return not self.started
+
+
+def _stream_llm(
+        prompt_value: PromptValue,
+        configurable: Configuration,
+        schema: Optional[type[BaseModel]],
+        stream_field: Optional[str],
+        on_token: Callable[[str], None]
+):
+    """Stream an LLM call, passing each new piece of text to `on_token`, and return the result with its raw message."""
+    if schema is None:
+        message = None
+        for chunk in get_llm(configurable.provider, configurable.model, configurable.temperature).stream(prompt_value):
+            if isinstance(chunk.content, str) and chunk.content:
+                on_token(chunk.content)
+            message = chunk if message is None else message + chunk
+        message = message_chunk_to_message(message)
+        return message, message
+
+    raw_message, parsed, streamed_text = None, None, ""
+    llm = get_llm(configurable.provider, configurable.model, configurable.temperature, schema=schema, include_raw=True)
+    for chunk in llm.stream(prompt_value):
+        if chunk.get("raw") is not None:
+            raw_message = chunk["raw"] if raw_message is None else raw_message + chunk["raw"]
+            text = _streamed_field_text(raw_message, stream_field) if stream_field else ""
+            if len(text) > len(streamed_text):
+                on_token(text[len(streamed_text):])
+                streamed_text = text
+        if chunk.get("parsing_error") is not None:
+            raise chunk["parsing_error"]
+        if chunk.get("parsed") is not None:
+            parsed = chunk["parsed"]
+    return parsed, raw_message
+
+
+async def _astream_llm(
+        prompt_value: PromptValue,
+        configurable: Configuration,
+        schema: Optional[type[BaseModel]],
+        stream_field: Optional[str],
+        on_token: Callable[[str], None]
+):
+    """Async version of `_stream_llm`."""
+    if schema is None:
+        message = None
+        async for chunk in get_llm(configurable.provider, configurable.model, configurable.temperature).astream(prompt_value):
+            if isinstance(chunk.content, str) and chunk.content:
+                on_token(chunk.content)
+            message = chunk if message is None else message + chunk
+        message = message_chunk_to_message(message)
+        return message, message
+
+    raw_message, parsed, streamed_text = None, None, ""
+    llm = get_llm(configurable.provider, configurable.model, configurable.temperature, schema=schema, include_raw=True)
+    async for chunk in llm.astream(prompt_value):
+        if chunk.get("raw") is not None:
+            raw_message = chunk["raw"] if raw_message is None else raw_message + chunk["raw"]
+            text = _streamed_field_text(raw_message, stream_field) if stream_field else ""
+            if len(text) > len(streamed_text):
+                on_token(text[len(streamed_text):])
+                streamed_text = text
+        if chunk.get("parsing_error") is not None:
+            raise chunk["parsing_error"]
+        if chunk.get("parsed") is not None:
+            parsed = chunk["parsed"]
+    return parsed, raw_message
+
+
+def invoke_llm(
+        prompt: ChatPromptTemplate,
+        inputs: dict[str, Any],
+        configurable: Configuration,
+        schema: Optional[type[BaseModel]] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        stream_field: Optional[str] = None
+):
+    """
+    Render a prompt and invoke the configured LLM on it.
+
+    The rendered prompt is used to reserve the request and token budget of the configured
+    provider and model from the shared rate limiter. Once the response arrives, the reservation
+    is corrected with the token usage reported by the provider, if any.
+
+    The call goes through the shared resilience layer: each attempt gets `llm_timeout_seconds`,
+    transient errors are retried with backoff up to `llm_max_retries` times, the provider's
+    circuit breaker fails fast after repeated failures, and slow calls may be hedged. Streamed
+    calls are never hedged and are only retried until their first token.
+
+    When the LLM cache is enabled, responses are looked up by a hash of the rendered messages,
+    the model settings and the output schema first, and identical calls are answered from the
+    cache without touching the rate limiter or the provider.
+
+    When `on_token` is given, the response is streamed and every new piece of text is passed
+    to it as soon as it is produced. For structured output, the text of the `stream_field`
+    attribute is streamed.
+
+    Args:
+        prompt: The chat prompt template to render.
+        inputs: The variables used to render the prompt.
+        configurable: The configuration holding the provider, model, rate limits and cache settings.
+        schema: Optional pydantic model the output should be structured as.
+        on_token: Optional callback receiving the response text as it is streamed.
+        stream_field: The text attribute of `schema` to stream to `on_token`.
+
+    Returns:
+        The output of the LLM, an AIMessage or an instance of `schema`.
+    """
+    prompt_value = prompt.invoke(inputs)
+    messages = prompt_value.to_messages()
+
+    cache, cache_key, cached = _read_llm_cache(messages, configurable, schema)
+    if cached is not None:
+        record_llm_cache_hit()
+        if on_token is not None:
+            on_token(getattr(cached, stream_field) if schema is not None else cached.content)
+        return cached
+
+    estimated_tokens = estimate_tokens(messages)
+    wait_started_at = time.monotonic()
+    rate_limiter.acquire(
+        configurable.provider,
+        configurable.model,
+        tokens=estimated_tokens,
+        requests_per_minute=configurable.llm_requests_per_minute,
+        tokens_per_minute=configurable.llm_tokens_per_minute
+    )
+    with concurrency_limiter.slot("llm", configurable.max_concurrent_llm_calls):
+        wait_seconds = time.monotonic() - wait_started_at
+        if on_token is not None:
+            token_gate = _TokenGate(on_token)
+            result, raw_message = resilience.call(
+                configurable.provider,
+                lambda: _stream_llm(prompt_value, configurable, schema, stream_field, token_gate.attempt()),
+                llm_policy(configurable),
+                can_retry=token_gate.can_retry,
+                hedge=False
+            )
+        else:
+            # Structured output keeps the raw message, whose usage metadata is the exact token count
+            llm = get_llm(configurable.provider, configurable.model, configurable.temperature, schema=schema, include_raw=schema is not None)
+            result, raw_message = resilience.call(
+                configurable.provider,
+                lambda: _unwrap_output(llm.invoke(prompt_value), schema),
+                llm_policy(configurable)
+            )
+
+    _finish_llm_call(result, raw_message, estimated_tokens, wait_seconds, configurable, schema, cache, cache_key)
+    return result
+
+
+async def ainvoke_llm(
+        prompt: ChatPromptTemplate,
+        inputs: dict[str, Any],
+        configurable: Configuration,
+        schema: Optional[type[BaseModel]] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        stream_field: Optional[str] = None
+):
+    """
+    Async version of `invoke_llm`.
+
+    Waits for the rate limiter and the model without blocking the event loop, so a single
+    loop can drive many concurrent research sessions. The SQLite cache is read and written on
+    a worker thread for the same reason.
+    """
+    prompt_value = await prompt.ainvoke(inputs)
+    messages = prompt_value.to_messages()
+
+    if configurable.llm_cache_enabled:
+        cache, cache_key, cached = await asyncio.to_thread(_read_llm_cache, messages, configurable, schema)
+    else:
+        cache, cache_key, cached = None, None, None
+    if cached is not None:
+        record_llm_cache_hit()
+        if on_token is not None:
+            on_token(getattr(cached, stream_field) if schema is not None else cached.content)
+        return cached
+
+    estimated_tokens = estimate_tokens(messages)
+    wait_started_at = time.monotonic()
+    await rate_limiter.aacquire(
+        configurable.provider,
+        configurable.model,
+        tokens=estimated_tokens,
+        requests_per_minute=configurable.llm_requests_per_minute,
+        tokens_per_minute=configurable.llm_tokens_per_minute
+    )
+    async with concurrency_limiter.aslot("llm", configurable.max_concurrent_llm_calls):
+        wait_seconds = time.monotonic() - wait_started_at
+        if on_token is not None:
+            token_gate = _TokenGate(on_token)
+            result, raw_message = await resilience.acall(
+                configurable.provider,
+                lambda: _astream_llm(prompt_value, configurable, schema, stream_field, token_gate.attempt()),
+                llm_policy(configurable),
+                can_retry=token_gate.can_retry,
+                hedge=False
+            )
+        else:
+            llm = get_llm(configurable.provider, configurable.model, configurable.temperature, schema=schema, include_raw=schema is not None)
+
+            async def invoke():
+                return _unwrap_output(await llm.ainvoke(prompt_value), schema)
+
+            result, raw_message = await resilience.acall(configurable.provider, invoke, llm_policy(configurable))
+
+    if cache is not None:
+        await asyncio.to_thread(_finish_llm_call, result, raw_message, estimated_tokens, wait_seconds, configurable, schema, cache, cache_key)
+    else:
+        _finish_llm_call(result, raw_message, estimated_tokens, wait_seconds, configurable, schema, cache, cache_key)
+    return result
@@ -1,9 +1,32 @@
-from deep_research.graph import agent_graph
-from IPython.display import Image, display
+from deep_research.graph import get_agent_graph
+from deep_research.blobs import get_blob_store
+from deep_research.checkpoint import get_checkpointer, compact_checkpoints, prune_blobs
+from deep_research.configuration import Configuration
+from deep_research.metrics import metrics
+from deep_research.resilience import resilience
+from deep_research.search import search_cache_stats
+from deep_research.event_log import get_event_logger
+from langgraph.types import Command
+from dataclasses import asdict
+import argparse
 import uuid
 import os
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate a deep research report.")
+    parser.add_argument(
+        "--resume",
+        metavar="THREAD_ID",
+        help="Resume the run of THREAD_ID from its last completed node, using the SQLite checkpointer"
+    )
+    parser.add_argument(
+        "--checkpointer",
+        choices=("sqlite", "memory"),
+        default="sqlite",
+        help="Where the checkpoints of a new run are kept; only SQLite runs can be resumed (default: sqlite)"
+    )
+    args = parser.parse_args()
+
     # TOPIC = "Human Psychology"
     # OUTLINE = "To understand human behaviour about why they always take actions that are selfish and in their best interest, leaving the rest of the world to suffer, including the ones who had supported and loved them all along."
     TOPIC = "LLM Benchmarking"
@@ -11,45 +34,91 @@ def main():
     
     thread = {
         "configurable": {
-            "thread_id": str(uuid.uuid4()),
+            "thread_id": args.resume or str(uuid.uuid4()),
             "max_queries": 3,
             "search_depth": 3,
             "num_reflections": 3,
-            "temperature": 0.7
+            "temperature": 0.7,
+            "checkpointer": "sqlite" if args.resume else args.checkpointer
         }
     }
 
+    configurable = Configuration.from_runnable_config(thread)
+    agent_graph = get_agent_graph(configurable)
+
+    if args.resume:
+        if configurable.checkpointer != "sqlite":
+            print(f"Runs can only be resumed from the SQLite checkpointer, but CHECKPOINTER is set to '{configurable.checkpointer}'.")
+            return
+        if not agent_graph.get_state(thread).next:
+            print(f"Thread {args.resume} has no pending work to resume.")
+            return
+        print(f"Resuming thread {args.resume} from its last checkpoint...")
+        graph_input = None
+    else:
+        print(f"Thread ID: {thread['configurable']['thread_id']}")
+        if configurable.checkpointer == "sqlite":
+            print(f"If the run is interrupted, continue it with: python main.py --resume {thread['configurable']['thread_id']}")
+        graph_input = {"topic": TOPIC, "outline": OUTLINE}
+
     os.makedirs("logs", exist_ok=True)
     os.makedirs("report", exist_ok=True)
 
-    for event in agent_graph.stream(
-        {"topic": TOPIC, "outline": OUTLINE},
-        config=thread,
-    ):
-        with open("logs/agent_logs.txt", "a") as f:
-            f.write(str(event))
-            f.write("\n\n\n")
-
-        if "report_structure_planner" in event:
-            print("<<< REPORT STRUCTURE PLANNER >>>")
-            print(event["report_structure_planner"]["messages"][-1].content)
-            print("\n", "="*100, "\n")
-        elif "section_formatter" in event:
-            pass
-        elif "research_agent" in event:
-            pass
-        elif "human_feedback" in event:
-            print("<<< HUMAN FEEDBACK >>>")
-            print(event["human_feedback"]["messages"][-1].content)
-            print("\n", "="*100, "\n")
-        elif "queue_next_section" in event:
-            pass
-        elif "finalizer" in event:
-            print("Final report complete.")
-        else:
-            print("<<< UNKNOWN EVENT >>>")
-            print(event)
-            print("\n", "="*100, "\n")
+    thread_id = thread["configurable"]["thread_id"]
+    event_logger = get_event_logger(configurable)
+    event_logger.info("run_started", thread_id=thread_id, resume=bool(args.resume), configuration=asdict(configurable))
+
+    while True:
+        for event in agent_graph.stream(
+            graph_input,
+            config=thread,
+        ):
+            for node, update in event.items():
+                event_logger.info("graph_update", thread_id=thread_id, node=node, update=update)
+
+            if "report_structure_planner" in event:
+                print("<<< REPORT STRUCTURE PLANNER >>>")
+                print(event["report_structure_planner"]["messages"][-1].content)
+                print("\n", "="*100, "\n")
+            elif "section_formatter" in event:
+                pass
+            elif "research_agent" in event:
+                pass
+            elif "human_feedback" in event:
+                print("<<< HUMAN FEEDBACK >>>")
+                print(event["human_feedback"]["messages"][-1].content if "messages" in event["human_feedback"] else "Auto-approved")
+                print("\n", "="*100, "\n")
+            elif "queue_next_section" in event:
+                pass
+            elif "finalizer" in event:
+                print("Final report complete.")
+            elif "__interrupt__" in event:
+                pass
+            else:
+                print("<<< UNKNOWN EVENT >>>")
+                print(event)
+                print("\n", "="*100, "\n")
+
+        # The run is checkpointed while it waits for feedback, and resumed with the answer
+        interrupts = [task_interrupt for task in agent_graph.get_state(thread).tasks for task_interrupt in task.interrupts]
+        if not interrupts:
+            break
+        feedback = input(interrupts[0].value["question"])
+        event_logger.info("human_feedback", thread_id=thread_id, feedback=feedback)
+        graph_input = Command(resume=feedback)
+
+    cache_stats = search_cache_stats(configurable)
+    event_logger.info("run_finished", thread_id=thread_id, metrics=metrics.summary(thread_id), resilience=resilience.counters(), search_cache=cache_stats)
+    print(metrics.summary_table(thread_id))
+    for key, counters in resilience.counters().items():
+        print(f"{key}: " + ", ".join(f"{event} {count}" for event, count in sorted(counters.items())))
+    if cache_stats is not None:
+        print("search cache: " + ", ".join(f"{event} {count}" for event, count in cache_stats.items()))
+    metrics.export_jsonl(f"logs/spans/{thread_id}.jsonl", thread_id)
+
+    if configurable.checkpointer == "sqlite":
+        compact_checkpoints(get_checkpointer(configurable), thread["configurable"]["thread_id"])
+        prune_blobs(get_checkpointer(configurable), get_blob_store(configurable.blob_store_path))
     
 
 if __name__ == "__main__":
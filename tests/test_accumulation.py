@@ -0,0 +1,87 @@
+import asyncio
+import uuid
+
+import pytest
+
+from benchmarks.fakes import FakeAsyncTavilyClient, FakeChatModel, FakeTavilyClient
+from deep_research import search, utils
+from deep_research.blobs import get_blob_store
+from deep_research.configuration import Configuration
+from deep_research.documents import clear_document_store, get_document_store
+from deep_research.nodes import atavily_search_node, result_accumulator_node, tavily_search_node
+from deep_research.struct import Query, SearchResult, SearchResults
+
+
+def test_incremental_accumulation_carries_dropped_documents_over(monkeypatch, tmp_path):
+    monkeypatch.setattr(utils, "init_llm", lambda **kwargs: FakeChatModel(output_tokens=10))
+    utils.get_llm.cache_clear()
+    thread_id = str(uuid.uuid4())
+    configurable = {
+        "thread_id": thread_id,
+        "blob_store_path": str(tmp_path / "blobs"),
+        "incremental_accumulation": True,
+        # Room for the prompt and a single document
+        "prompt_token_budget": 1000,
+    }
+    document_store = get_document_store(Configuration(**configurable))
+    results = [
+        SearchResult(url=f"https://example.com/{i}", title=f"Page {i}", document_id=document_store.put(f"https://example.com/{i}", f"page {i} " * 200))
+        for i in range(3)
+    ]
+    state = {
+        "search_results": [SearchResults(query=Query(query="q"), results=results)],
+        "accumulated_content_id": get_blob_store(configurable["blob_store_path"]).put("Earlier content."),
+        "accumulated_document_ids": [],
+    }
+
+    synthesized = []
+    for _ in range(3):
+        update = result_accumulator_node(state, {"configurable": configurable})
+        synthesized.append(update["accumulated_document_ids"][len(state["accumulated_document_ids"]):])
+        state = {**state, **update}
+    clear_document_store(thread_id)
+    utils.get_llm.cache_clear()
+
+    # Each round only fits one document, and the dropped ones are synthesized by the next rounds
+    assert synthesized == [[result.document_id] for result in results]
+
+
+class FailingChatModel(FakeChatModel):
+    """Fails every call whose prompt mentions `fail_on`."""
+
+    fail_on: str = ""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if any(self.fail_on in str(message.content) for message in messages):
+            raise ValueError("unparsable output")
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return self._generate(messages, stop, run_manager, **kwargs)
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_failed_map_calls_are_skipped(mode, monkeypatch, tmp_path):
+    monkeypatch.setenv("TAVILY_API_KEY", "test")
+    monkeypatch.setattr(utils, "init_llm", lambda **kwargs: FailingChatModel(output_tokens=10, fail_on="Result 1 for second"))
+    monkeypatch.setattr(search, "TavilyClient", FakeTavilyClient)
+    monkeypatch.setattr(search, "AsyncTavilyClient", FakeAsyncTavilyClient)
+    utils.get_llm.cache_clear()
+    thread_id = str(uuid.uuid4())
+    config = {"configurable": {
+        "thread_id": thread_id,
+        "blob_store_path": str(tmp_path / "blobs"),
+        "map_reduce_accumulation": True,
+        "search_depth": 1,
+    }}
+    state = {"generated_queries": [Query(query="first"), Query(query="second"), Query(query="third")], "search_results": []}
+
+    if mode == "sync":
+        update = tavily_search_node(state, config)
+    else:
+        update = asyncio.run(atavily_search_node(state, config))
+    clear_document_store(thread_id)
+    utils.get_llm.cache_clear()
+
+    assert len(update["search_results"]) == 3
+    assert len(update["partial_summary_ids"]) == 2
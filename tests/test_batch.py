@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+from benchmarks.fakes import FakeAsyncTavilyClient, FakeChatModel, FakeTavilyClient
+from deep_research import search, utils
+from deep_research.batch import run_batch
+from deep_research.struct import ConclusionAndReferences
+
+
+class CrashingChatModel(FakeChatModel):
+    """Fails the conclusion and counts the plain text calls it answers."""
+
+    crash_conclusion: bool = False
+    text_calls: int = 0
+
+    def _message(self, messages):
+        self.text_calls += 1
+        return super()._message(messages)
+
+    def structured_output(self, schema):
+        if self.crash_conclusion and schema is ConclusionAndReferences:
+            raise ConnectionError("The process died.")
+        return super().structured_output(schema)
+
+
+def test_unfinished_items_resume_from_their_checkpoints(monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TAVILY_API_KEY", "test")
+    monkeypatch.setattr(search, "TavilyClient", FakeTavilyClient)
+    monkeypatch.setattr(search, "AsyncTavilyClient", FakeAsyncTavilyClient)
+    input_path = tmp_path / "items.jsonl"
+    input_path.write_text(json.dumps({"id": "item", "topic": "Resuming", "outline": "A report."}) + "\n", encoding="utf-8")
+    configurable = {
+        "checkpointer": "sqlite",
+        "checkpoint_path": str(tmp_path / "checkpoints.sqlite"),
+        "blob_store_path": str(tmp_path / "blobs"),
+        "search_depth": 1,
+        "num_reflections": 1,
+        "llm_max_retries": 0,
+    }
+
+    def run(model: CrashingChatModel):
+        monkeypatch.setattr(utils, "init_llm", lambda **kwargs: model)
+        utils.get_llm.cache_clear()
+        summary = asyncio.run(run_batch(str(input_path), str(tmp_path / "out"), configurable, max_concurrent_reports=1))
+        utils.get_llm.cache_clear()
+        return summary
+
+    crashed = CrashingChatModel(output_tokens=20, num_sections=2, num_queries=1, crash_conclusion=True)
+    assert run(crashed)["failed"] == 1
+    assert crashed.text_calls > 0
+
+    resumed = CrashingChatModel(output_tokens=20, num_sections=2, num_queries=1)
+    assert run(resumed)["succeeded"] == 1
+    assert "Resuming item item from its last checkpoint." in capsys.readouterr().out
+    # Only the conclusion is generated again, the sections come from the checkpoint
+    assert resumed.text_calls == 0
+    assert (tmp_path / "out" / "reports" / "item.md").read_text(encoding="utf-8").endswith("- Reference 5")
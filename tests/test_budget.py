@@ -0,0 +1,35 @@
+from langchain_core.prompts import ChatPromptTemplate
+
+from deep_research import budget
+from deep_research.budget import PromptInput, fit_prompt_inputs, prompt_token_budget
+from deep_research.configuration import Configuration
+
+PROMPT = ChatPromptTemplate.from_messages([("human", "{search_results}")])
+
+
+def _fit(configurable: Configuration, pieces):
+    return fit_prompt_inputs(PROMPT, {}, configurable, [PromptInput("search_results", list(pieces), priority=0, strategy="drop")])
+
+
+def test_known_models_use_their_context_window():
+    configurable = Configuration(model="gpt-5-mini", reserved_output_tokens=0)
+    assert prompt_token_budget(configurable) == int(400_000 * budget.CONTEXT_WINDOW_SAFETY_MARGIN)
+
+
+def test_unknown_models_are_not_trimmed_and_warned_about_once(capsys):
+    budget._warn_unknown_context_window.cache_clear()
+    configurable = Configuration(model="qwen3:8b")
+    pieces = ["word " * 4000] * 3
+    assert prompt_token_budget(configurable) is None
+    assert _fit(configurable, pieces)["search_results"] == "\n\n".join(pieces)
+    _fit(configurable, pieces)
+    assert capsys.readouterr().out.count("context window of qwen3:8b is unknown") == 1
+
+
+def test_unknown_models_use_the_configured_window_or_budget():
+    budget._warn_unknown_context_window.cache_clear()
+    assert prompt_token_budget(Configuration(model="qwen3:8b", context_window_tokens=40_960, reserved_output_tokens=0)) == int(40_960 * budget.CONTEXT_WINDOW_SAFETY_MARGIN)
+    configurable = Configuration(model="qwen3:8b", prompt_token_budget=1000)
+    assert prompt_token_budget(configurable) == 1000
+    fitted = _fit(configurable, ["word " * 400] * 5)
+    assert fitted["search_results"].count("word") < 5 * 400
@@ -0,0 +1,58 @@
+import os
+import time
+import uuid
+
+from benchmarks.fakes import FakeAsyncTavilyClient, FakeChatModel, FakeTavilyClient
+from deep_research import search, utils
+from deep_research.blobs import get_blob_store
+from deep_research.checkpoint import compact_checkpoints, get_sqlite_saver, prune_blobs
+from deep_research.configuration import Configuration
+from deep_research.documents import clear_document_store
+from deep_research.graph import get_agent_graph
+
+
+def test_prune_blobs_keeps_what_the_checkpoints_refer_to(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TAVILY_API_KEY", "test")
+    (tmp_path / "logs").mkdir()
+    (tmp_path / "reports").mkdir()
+    monkeypatch.setattr(utils, "init_llm", lambda **kwargs: FakeChatModel(output_tokens=20, num_sections=2, num_queries=1))
+    monkeypatch.setattr(search, "TavilyClient", FakeTavilyClient)
+    monkeypatch.setattr(search, "AsyncTavilyClient", FakeAsyncTavilyClient)
+    utils.get_llm.cache_clear()
+
+    thread_id = str(uuid.uuid4())
+    config = {"configurable": {
+        "thread_id": thread_id,
+        "auto_approve": True,
+        "checkpointer": "sqlite",
+        "checkpoint_path": str(tmp_path / "checkpoints.sqlite"),
+        "blob_store_path": str(tmp_path / "blobs"),
+        "search_depth": 1,
+        "num_reflections": 1,
+    }}
+    configurable = Configuration.from_runnable_config(config)
+    agent_graph = get_agent_graph(configurable)
+    agent_graph.invoke({"topic": "Pruning", "outline": "A report."}, config)
+    clear_document_store(thread_id)
+    utils.get_llm.cache_clear()
+
+    blob_store = get_blob_store(configurable.blob_store_path)
+    old_orphan = blob_store.put("Nothing refers to this blob.")
+    recent_orphan = blob_store.put("Nothing refers to this blob either.")
+    past = time.time() - 3600
+    os.utime(blob_store._blob_path(old_orphan), (past, past))
+
+    saver = get_sqlite_saver(configurable.checkpoint_path)
+    compact_checkpoints(saver)
+    assert prune_blobs(saver, blob_store, min_age_seconds=60) == 1
+    assert not os.path.exists(blob_store._blob_path(old_orphan))
+    assert blob_store.get(recent_orphan) == "Nothing refers to this blob either."
+
+    # Without a grace period, only the blobs of superseded checkpoints go
+    assert prune_blobs(saver, blob_store, min_age_seconds=0) > 0
+    state = agent_graph.get_state(config).values
+    referenced_ids = [section_content.content_id for section_content in state["final_section_content"]]
+    referenced_ids += [result.document_id for search_results in state["search_results"] for result in search_results.results]
+    assert referenced_ids
+    assert all(os.path.exists(blob_store._blob_path(blob_id)) for blob_id in referenced_ids)
@@ -0,0 +1,55 @@
+from deep_research.preprocess import clean_content, find_shared_lines, preprocess_content
+
+
+def test_keeps_prose_mentioning_boilerplate_keywords():
+    content = (
+        "JavaScript closures explained\n"
+        "A closure captures variables from its enclosing scope in JavaScript.\n"
+        "Register allocation is done after instruction selection.\n"
+        "Read more about the copyright of datasets in the appendix."
+    )
+    assert clean_content(content) == content
+
+
+def test_keeps_numeric_lines_and_table_rows():
+    content = "Model | MMLU | GSM8K\nGPT-4 | 86.4 | 92.0\nClaude | 86.8 | 95.0\n1987\n3.14"
+    assert clean_content(content) == content
+
+
+def test_keeps_markdown_table_rows():
+    content = "| Name | Role |\n|---|---|\n| Ada | Author |"
+    assert clean_content(content) == content
+
+
+def test_drops_navigation_links_and_separators():
+    content = "Home | About | Blog | Contact\n[Home](/) | [Blog](/blog)\n![logo](logo.png)\n* * *\nActual content."
+    assert clean_content(content) == "Actual content."
+
+
+def test_drops_keyword_lines_with_links():
+    content = "[Log in](/login) to comment\nSubscribe to our [newsletter](/newsletter)\nActual content."
+    assert clean_content(content) == "Actual content."
+
+
+def test_drops_keyword_lines_repeated_across_documents():
+    pages = [
+        "Accept all cookies\nFirst page content.\nJavaScript closures explained",
+        "Accept all cookies\nSecond page content.",
+    ]
+    shared_lines = find_shared_lines(pages)
+    assert shared_lines == {"accept all cookies"}
+    assert clean_content(pages[0], shared_lines) == "First page content.\nJavaScript closures explained"
+    # A repeated line without a boilerplate keyword is content
+    assert clean_content("Key results\nBody.", {"key results"}) == "Key results\nBody."
+
+
+def test_drops_lines_repeated_on_the_page_and_collapses_whitespace():
+    content = "Intro  text\n\n\n\nIntro text\nMore\t text"
+    assert clean_content(content) == "Intro text\n\nMore text"
+
+
+def test_preprocess_content_truncates_and_counts_removed_tokens():
+    processed, removed = preprocess_content("word " * 400, max_tokens=50)
+    assert processed.endswith(" ...")
+    assert len(processed) <= 50 * 4 + 4
+    assert removed > 0
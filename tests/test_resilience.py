@@ -0,0 +1,46 @@
+import threading
+import time
+
+import pytest
+
+from deep_research.resilience import CircuitOpenError, Resilience, ResiliencePolicy
+
+
+def test_non_retryable_errors_leave_the_circuit_open():
+    resilience = Resilience()
+    policy = ResiliencePolicy(breaker_failures=1, breaker_reset_seconds=0.05)
+
+    def fail(error: Exception):
+        raise error
+
+    with pytest.raises(ConnectionError):
+        resilience.call("provider", lambda: fail(ConnectionError()), policy)
+    with pytest.raises(CircuitOpenError):
+        resilience.call("provider", lambda: "ok", policy)
+
+    # The trial fails with a non-retryable error: the circuit stays open, but the trial is released
+    time.sleep(0.06)
+    with pytest.raises(ValueError):
+        resilience.call("provider", lambda: fail(ValueError("unparsable output")), policy)
+    breaker = resilience._breakers["provider"]
+    assert breaker.opened_at is not None and breaker.failures == 1 and not breaker.trial_in_flight
+    assert resilience.call("provider", lambda: "ok", policy) == "ok"
+    assert breaker.opened_at is None and breaker.failures == 0
+
+
+def test_waiting_for_a_saturated_pool_is_bounded_by_the_timeout():
+    resilience = Resilience()
+    release = threading.Event()
+    abandoned = ResiliencePolicy(timeout_seconds=0.01)
+    try:
+        # Fill every worker of the pool with attempts that time out but keep running
+        for _ in range(64):
+            with pytest.raises(TimeoutError):
+                resilience.call("provider", release.wait, abandoned)
+
+        started_at = time.monotonic()
+        with pytest.raises(TimeoutError, match="free worker"):
+            resilience.call("provider", lambda: "ok", ResiliencePolicy(timeout_seconds=0.2))
+        assert time.monotonic() - started_at < 1
+    finally:
+        release.set()
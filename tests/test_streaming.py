@@ -0,0 +1,61 @@
+import asyncio
+import uuid
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from benchmarks.fakes import FILLER, FakeAsyncTavilyClient, FakeChatModel, FakeTavilyClient
+from deep_research import search, utils
+from deep_research.utils import _streamed_field_text
+
+
+def test_streamed_field_text_reads_partial_tool_call_chunks():
+    chunk = AIMessageChunk(content="", tool_call_chunks=[{"name": "C", "args": '{"conclusion": "Part of the', "id": "1", "index": 0}])
+    assert _streamed_field_text(chunk, "conclusion") == "Part of the"
+
+
+def test_streamed_field_text_reads_complete_messages():
+    # Models without native streaming yield the whole AIMessage at once
+    message = AIMessage(content="", tool_calls=[{"name": "C", "args": {"conclusion": "Done."}, "id": "1"}])
+    assert _streamed_field_text(message, "conclusion") == "Done."
+    assert _streamed_field_text(AIMessage(content='{"conclusion": "From JSON"}'), "conclusion") == "From JSON"
+    assert _streamed_field_text(AIMessage(content="plain text"), "conclusion") == ""
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_stream_tokens_runs_the_graph(mode, monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("TAVILY_API_KEY", "test")
+    (tmp_path / "logs").mkdir()
+    (tmp_path / "reports").mkdir()
+    fake_model = FakeChatModel(output_tokens=40, num_sections=2, num_queries=1)
+    monkeypatch.setattr(utils, "init_llm", lambda **kwargs: fake_model)
+    monkeypatch.setattr(search, "TavilyClient", FakeTavilyClient)
+    monkeypatch.setattr(search, "AsyncTavilyClient", FakeAsyncTavilyClient)
+    utils.get_llm.cache_clear()
+
+    from deep_research.graph import agent_graph
+
+    config = {"configurable": {
+        "thread_id": str(uuid.uuid4()),
+        "auto_approve": True,
+        "stream_tokens": True,
+        "max_queries": 1,
+        "search_depth": 1,
+        "num_reflections": 1,
+    }}
+    graph_input = {"topic": "Streaming", "outline": "A streamed report."}
+    if mode == "sync":
+        result = agent_graph.invoke(graph_input, config)
+    else:
+        result = asyncio.run(agent_graph.ainvoke(graph_input, config))
+    utils.get_llm.cache_clear()
+
+    output = capsys.readouterr().out
+    assert "<<< CONCLUSION >>>" in output
+    assert FILLER.strip() in output
+    section_logs = sorted((tmp_path / "logs" / "section_content").iterdir())
+    assert len(section_logs) == 2
+    assert all(FILLER.strip() in section_log.read_text(encoding="utf-8") for section_log in section_logs)
+    assert result["final_report_content"] == (tmp_path / "reports" / "Streaming.md").read_text(encoding="utf-8")